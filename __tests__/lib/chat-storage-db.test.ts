@@ -0,0 +1,73 @@
+/**
+ * @jest-environment node
+ */
+import { DatabaseChatStorageService } from '@/lib/chat-storage-db'
+import { ChatMessage } from '@/lib/types'
+
+// Mock the database module
+jest.mock('@/lib/database', () => ({
+  Database: {
+    query: jest.fn(),
+    getClient: jest.fn(),
+  },
+}))
+
+import { Database } from '@/lib/database'
+
+const placeholdersOf = (sql: string) => (sql.match(/\$\d+/g) || []).map(p => Number(p.slice(1)))
+
+describe('DatabaseChatStorageService.saveChat', () => {
+  let client: { query: jest.Mock; release: jest.Mock }
+
+  beforeEach(() => {
+    jest.clearAllMocks()
+    client = {
+      query: jest.fn(async (text: string) =>
+        text.includes('RETURNING created_at') ? { rows: [{ created_at: new Date() }] } : { rows: [] }
+      ),
+      release: jest.fn(),
+    }
+    ;(Database.getClient as jest.Mock).mockResolvedValue(client)
+  })
+
+  const messagesOf = (count: number): ChatMessage[] => Array.from({ length: count }, (_, i) => ({
+    id: `msg-${i}`,
+    role: (i % 2 === 0 ? 'user' : 'assistant') as ChatMessage['role'],
+    content: `message ${i}`,
+    timestamp: new Date(),
+  }))
+
+  it('shares $1/$2 across rows and numbers message columns per batch', async () => {
+    const saved = await DatabaseChatStorageService.getInstance().saveChat('chat-1', messagesOf(501), 'user-1')
+
+    expect(saved?.messageCount).toBe(501)
+    const inserts = client.query.mock.calls.filter(([text]) => text.includes('INSERT INTO chat_messages'))
+    expect(inserts).toHaveLength(2)
+
+    const [firstSql, firstParams] = inserts[0]
+    expect(firstParams).toHaveLength(2 + 500 * 8)
+    expect(firstParams.slice(0, 3)).toEqual(['chat-1', 'user-1', 'msg-0'])
+    expect(Math.max(...placeholdersOf(firstSql))).toBe(firstParams.length)
+
+    const [lastSql, lastParams] = inserts[1]
+    expect(lastSql).toContain('VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)')
+    expect(lastParams).toHaveLength(10)
+    expect(lastParams.slice(0, 3)).toEqual(['chat-1', 'user-1', 'msg-500'])
+    expect(client.query).toHaveBeenLastCalledWith('COMMIT')
+    expect(client.release).toHaveBeenCalled()
+  })
+
+  it('rolls back and returns null when an insert fails', async () => {
+    jest.spyOn(console, 'error').mockImplementation(() => {})
+    client.query.mockImplementation(async (text: string) => {
+      if (text.includes('INSERT INTO chat_messages')) throw new Error('insert failed')
+      return text.includes('RETURNING created_at') ? { rows: [{ created_at: new Date() }] } : { rows: [] }
+    })
+
+    const saved = await DatabaseChatStorageService.getInstance().saveChat('chat-1', messagesOf(3), 'user-1')
+
+    expect(saved).toBeNull()
+    expect(client.query).toHaveBeenCalledWith('ROLLBACK')
+    expect(client.release).toHaveBeenCalled()
+  })
+})
@@ -0,0 +1,50 @@
+/**
+ * @jest-environment node
+ */
+import { Database } from '@/lib/database'
+
+// Keep the module-level pool from opening real connections
+jest.mock('pg', () => ({
+  Pool: jest.fn(() => ({
+    on: jest.fn(),
+    connect: jest.fn(),
+    query: jest.fn(),
+  })),
+}))
+
+const placeholdersOf = (sql: string) => (sql.match(/\$\d+/g) || []).map(p => Number(p.slice(1)))
+
+describe('Database.insertInBatches', () => {
+  let client: { query: jest.Mock }
+
+  beforeEach(() => {
+    client = { query: jest.fn().mockResolvedValue({ rows: [] }) }
+    jest.spyOn(console, 'log').mockImplementation(() => {})
+  })
+
+  afterEach(() => {
+    jest.restoreAllMocks()
+  })
+
+  it('restarts placeholder numbering at $1 for every batch', async () => {
+    const rows = Array.from({ length: 1001 }, (_, i) => [`supplier-${i}`, i])
+
+    const imported = await (Database as any).insertInBatches(client, 'baanspending', ['supplier', 'reporting_total'], rows, 'rows')
+
+    expect(imported).toBe(1001)
+    expect(client.query).toHaveBeenCalledTimes(2)
+
+    const [firstSql, firstParams] = client.query.mock.calls[0]
+    expect(firstParams).toHaveLength(2000)
+    expect(placeholdersOf(firstSql)).toEqual(Array.from({ length: 2000 }, (_, i) => i + 1))
+
+    const [lastSql, lastParams] = client.query.mock.calls[1]
+    expect(lastSql).toBe('INSERT INTO baanspending (supplier, reporting_total) VALUES ($1, $2)')
+    expect(lastParams).toEqual(['supplier-1000', 1000])
+  })
+
+  it('issues no statement for an empty import', async () => {
+    await expect((Database as any).insertInBatches(client, 'baanspending', ['supplier'], [], 'rows')).resolves.toBe(0)
+    expect(client.query).not.toHaveBeenCalled()
+  })
+})
@@ -0,0 +1,196 @@
+/**
+ * @jest-environment node
+ */
+import { DatabaseMessageStorage } from '@/lib/message-storage-db'
+
+// Mock the database module
+jest.mock('@/lib/database', () => ({
+  Database: {
+    query: jest.fn(),
+  },
+}))
+
+import { Database } from '@/lib/database'
+
+describe('DatabaseMessageStorage.getMessageWithEvidence', () => {
+  const storage = DatabaseMessageStorage.getInstance()
+
+  // An evidence row as json_agg returns it: numbers stay numbers, timestamps become ISO strings
+  const evidenceJson = {
+    evidence_id: 'ev-1',
+    message_id: 'msg-1',
+    user_id: 'user-1',
+    evidence_type: 'sql_query',
+    evidence_data: { sql: 'SELECT 1' },
+    metadata: null,
+    confidence_score: 0.85,
+    data_sources: ['baan'],
+    artifact_url: null,
+    created_at: '2025-01-02T03:04:05.000',
+    updated_at: '2025-01-02T03:04:05.000',
+  }
+
+  const messageRow = {
+    message_id: 'msg-1',
+    sql_query: 'SELECT 1',
+    response_data: { rows: [] },
+    feedback_message_id: 'msg-1',
+    rating: 'positive',
+    notes: 'useful',
+    evidence_reference_id: 'ev-1',
+    feedback_type: 'quality',
+    feedback_created_at: new Date('2025-01-03T00:00:00Z'),
+    feedback_updated_at: new Date('2025-01-03T00:00:00Z'),
+    evidence: [evidenceJson],
+  }
+
+  beforeEach(() => {
+    jest.clearAllMocks()
+  })
+
+  it('maps message data, feedback and json_agg evidence from one row', async () => {
+    ;(Database.query as jest.Mock).mockResolvedValue({ rows: [messageRow] })
+
+    const message = await storage.getMessageWithEvidence('msg-1', 'user-1')
+
+    expect(Database.query).toHaveBeenCalledWith(
+      expect.objectContaining({ name: 'messages_with_evidence' }),
+      [['msg-1'], 'user-1']
+    )
+    expect(message).toEqual({
+      messageId: 'msg-1',
+      sqlQuery: 'SELECT 1',
+      responseData: { rows: [] },
+      feedback: {
+        messageId: 'msg-1',
+        userId: 'user-1',
+        rating: 'positive',
+        notes: 'useful',
+        evidenceReferenceId: 'ev-1',
+        feedbackType: 'quality',
+        createdAt: messageRow.feedback_created_at,
+        updatedAt: messageRow.feedback_updated_at,
+      },
+      evidenceReferences: [{
+        evidenceId: 'ev-1',
+        messageId: 'msg-1',
+        userId: 'user-1',
+        evidenceType: 'sql_query',
+        evidenceData: { sql: 'SELECT 1' },
+        metadata: undefined,
+        confidenceScore: 0.85,
+        dataSources: ['baan'],
+        artifactUrl: null,
+        createdAt: new Date('2025-01-02T03:04:05.000'),
+        updatedAt: new Date('2025-01-02T03:04:05.000'),
+      }],
+    })
+  })
+
+  it('returns the same evidence types as getEvidenceReferences', async () => {
+    // pg hands DECIMAL columns back as strings and TIMESTAMP columns as Dates
+    const pgRow = {
+      ...evidenceJson,
+      confidence_score: '0.85',
+      created_at: new Date('2025-01-02T03:04:05.000'),
+      updated_at: new Date('2025-01-02T03:04:05.000'),
+    }
+    ;(Database.query as jest.Mock)
+      .mockResolvedValueOnce({ rows: [messageRow] })
+      .mockResolvedValueOnce({ rows: [pgRow] })
+
+    const message = await storage.getMessageWithEvidence('msg-1', 'user-1')
+    const references = await storage.getEvidenceReferences('msg-1', 'user-1')
+
+    expect(message?.evidenceReferences).toEqual(references)
+    expect(typeof references[0].confidenceScore).toBe('number')
+  })
+})
+
+describe('DatabaseMessageStorage.getConversationContext', () => {
+  const storage = DatabaseMessageStorage.getInstance()
+
+  // A message id with no stored data, evidence or feedback still comes back as a keys-only row
+  const keysOnlyRow = (messageId: string) => ({
+    message_id: messageId,
+    sql_query: null,
+    response_data: null,
+    feedback_message_id: null,
+    rating: null,
+    notes: null,
+    evidence_reference_id: null,
+    feedback_type: null,
+    feedback_created_at: null,
+    feedback_updated_at: null,
+    evidence: [],
+  })
+
+  beforeEach(() => {
+    jest.clearAllMocks()
+  })
+
+  it('loads every message in one query and keeps the requested order', async () => {
+    ;(Database.query as jest.Mock).mockResolvedValue({
+      rows: [{ ...keysOnlyRow('msg-2'), sql_query: 'SELECT 2' }, keysOnlyRow('msg-1')]
+    })
+
+    const context = await storage.getConversationContext(['msg-2', 'msg-1'], 'user-1')
+
+    expect(Database.query).toHaveBeenCalledTimes(1)
+    expect(Database.query).toHaveBeenCalledWith(
+      expect.objectContaining({ name: 'messages_with_evidence' }),
+      [['msg-2', 'msg-1'], 'user-1']
+    )
+    expect(context.map(message => message.messageId)).toEqual(['msg-2', 'msg-1'])
+    expect(context[0].sqlQuery).toBe('SELECT 2')
+  })
+
+  it('maps keys-only rows to empty messages', async () => {
+    ;(Database.query as jest.Mock).mockResolvedValue({ rows: [keysOnlyRow('msg-1')] })
+
+    const [message] = await storage.getConversationContext(['msg-1'], 'user-1')
+
+    expect(message).toEqual({
+      messageId: 'msg-1',
+      sqlQuery: null,
+      responseData: null,
+      evidenceReferences: [],
+      feedback: undefined,
+    })
+  })
+
+  it('skips the query when there are no message ids', async () => {
+    await expect(storage.getConversationContext([], 'user-1')).resolves.toEqual([])
+    expect(Database.query).not.toHaveBeenCalled()
+  })
+})
+
+describe('DatabaseMessageStorage.storeMany', () => {
+  const storage = DatabaseMessageStorage.getInstance()
+
+  beforeEach(() => {
+    jest.clearAllMocks()
+    ;(Database.query as jest.Mock).mockResolvedValue({ rows: [] })
+  })
+
+  it('splits large batches so no statement exceeds the bind-parameter limit', async () => {
+    const entries = Array.from({ length: 1001 }, (_, i) => ({ messageId: `msg-${i}`, sqlQuery: `SELECT ${i}` }))
+
+    await storage.storeMany('user-1', entries)
+
+    const calls = (Database.query as jest.Mock).mock.calls
+    expect(calls.map(([, params]) => params.length)).toEqual([500 * 4, 500 * 4, 4])
+    expect(calls[2][0]).toContain('VALUES ($1, $2, $3, $4, NOW())')
+    expect(calls[2][1]).toEqual(['msg-1000', 'user-1', 'SELECT 1000', null])
+  })
+
+  it('keeps only the last entry per message id', async () => {
+    await storage.storeMany('user-1', [
+      { messageId: 'msg-1', sqlQuery: 'SELECT 1' },
+      { messageId: 'msg-1', sqlQuery: 'SELECT 2' },
+    ])
+
+    expect(Database.query).toHaveBeenCalledTimes(1)
+    expect((Database.query as jest.Mock).mock.calls[0][1]).toEqual(['msg-1', 'user-1', 'SELECT 2', null])
+  })
+})
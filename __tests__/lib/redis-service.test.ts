@@ -0,0 +1,189 @@
+/**
+ * @jest-environment node
+ */
+import { SmartHeadCacheService } from '@/lib/cache/redis-service'
+
+// Shared connection and the WATCH/MULTI connections safeUpdate duplicates from it
+const mockTransaction = {
+  setex: jest.fn(),
+  set: jest.fn(),
+  exec: jest.fn(),
+}
+
+const mockTransactionRedis = {
+  on: jest.fn(),
+  watch: jest.fn().mockResolvedValue('OK'),
+  unwatch: jest.fn().mockResolvedValue('OK'),
+  get: jest.fn(),
+  multi: jest.fn(() => mockTransaction),
+  disconnect: jest.fn(),
+}
+
+const mockRedis = {
+  status: 'ready',
+  on: jest.fn(),
+  ping: jest.fn().mockResolvedValue('PONG'),
+  get: jest.fn(),
+  duplicate: jest.fn(() => mockTransactionRedis),
+  disconnect: jest.fn(),
+}
+
+jest.mock('ioredis', () => ({
+  __esModule: true,
+  default: jest.fn(() => mockRedis),
+}))
+
+describe('SmartHeadCacheService', () => {
+  let service: any
+
+  beforeAll(async () => {
+    service = SmartHeadCacheService.getInstance()
+    // The client is created in a deferred setTimeout; wait for the connection check
+    await service.initialized
+  })
+
+  beforeEach(() => {
+    jest.clearAllMocks()
+  })
+
+  describe('serialize / deserialize', () => {
+    it('stores small values as plain JSON', () => {
+      const value = { supplier: 'ACME', total: 42 }
+      const raw = service.serialize(value)
+
+      expect(raw).toBe(JSON.stringify(value))
+      expect(service.deserialize(raw)).toEqual(value)
+    })
+
+    it('gzips values at or above the threshold behind the gz: prefix', () => {
+      const value = { rows: Array.from({ length: 500 }, (_, i) => ({ id: i, supplier: `Supplier ${i}` })) }
+      const raw = service.serialize(value)
+
+      expect(raw.startsWith('gz:')).toBe(true)
+      expect(raw.length).toBeLessThan(JSON.stringify(value).length)
+      expect(service.deserialize(raw)).toEqual(value)
+    })
+
+    it('compresses from 8 KiB of JSON onwards', () => {
+      // JSON.stringify adds the two surrounding quotes
+      const justBelow = 'a'.repeat(8 * 1024 - 3)
+      const atThreshold = 'a'.repeat(8 * 1024 - 2)
+
+      expect(service.serialize(justBelow)).toBe(JSON.stringify(justBelow))
+      expect(service.serialize(atThreshold).startsWith('gz:')).toBe(true)
+      expect(service.deserialize(service.serialize(atThreshold))).toBe(atThreshold)
+    })
+  })
+
+  describe('safeUpdate', () => {
+    it('retries when the watched key changes before EXEC', async () => {
+      mockTransactionRedis.get
+        .mockResolvedValueOnce(JSON.stringify({ count: 1 }))
+        .mockResolvedValueOnce(JSON.stringify({ count: 2 }))
+      mockTransaction.exec
+        .mockResolvedValueOnce(null)
+        .mockResolvedValueOnce([[null, 'OK']])
+
+      const result = await service.safeUpdate('counter', (current: { count: number } | null) => ({
+        count: (current?.count || 0) + 1
+      }), 60)
+
+      expect(result).toEqual({ count: 3 })
+      expect(mockTransactionRedis.watch).toHaveBeenCalledTimes(2)
+      expect(mockTransaction.setex).toHaveBeenLastCalledWith('counter', 60, JSON.stringify({ count: 3 }))
+    })
+
+    it('gives up with null once every attempt conflicts', async () => {
+      mockTransactionRedis.get.mockResolvedValue(JSON.stringify({ count: 1 }))
+      mockTransaction.exec.mockResolvedValue(null)
+
+      const result = await service.safeUpdate('counter', (current: { count: number } | null) => ({
+        count: (current?.count || 0) + 1
+      }), 60)
+
+      expect(result).toBeNull()
+      expect(mockTransactionRedis.watch).toHaveBeenCalledTimes(3)
+    })
+
+    it('unwatches and skips the write when the updater returns null', async () => {
+      mockTransactionRedis.get.mockResolvedValue(null)
+
+      const result = await service.safeUpdate('missing', () => null)
+
+      expect(result).toBeNull()
+      expect(mockTransactionRedis.unwatch).toHaveBeenCalled()
+      expect(mockTransactionRedis.multi).not.toHaveBeenCalled()
+    })
+
+    it('never runs the transaction on the shared auto-pipelined connection', async () => {
+      mockTransactionRedis.get.mockResolvedValue(null)
+      mockTransaction.exec.mockResolvedValue([[null, 'OK']])
+
+      await service.safeUpdate('fresh', () => ({ ok: true }), 60)
+
+      expect(mockTransactionRedis.watch).toHaveBeenCalledWith('fresh')
+      expect(mockRedis.get).not.toHaveBeenCalled()
+    })
+
+    it('keeps the existing TTL when no ttl is given', async () => {
+      mockTransactionRedis.get.mockResolvedValue(JSON.stringify({ usageCount: 1 }))
+      mockTransaction.exec.mockResolvedValue([[null, 'OK']])
+
+      await service.safeUpdate('greeting', (current: { usageCount: number } | null) => ({
+        usageCount: (current?.usageCount || 0) + 1
+      }))
+
+      expect(mockTransaction.set).toHaveBeenCalledWith('greeting', JSON.stringify({ usageCount: 2 }), 'KEEPTTL')
+      expect(mockTransaction.setex).not.toHaveBeenCalled()
+    })
+
+    it('runs updates to different keys side by side up to the pool size', async () => {
+      mockTransactionRedis.get.mockResolvedValue(null)
+      const commits: Array<(value: unknown) => void> = []
+      mockTransaction.exec.mockImplementation(() => new Promise(resolve => commits.push(resolve)))
+
+      const updates = ['a', 'b', 'c', 'd', 'e'].map(key => service.safeUpdate(key, () => ({ key }), 60))
+      await new Promise(resolve => setImmediate(resolve))
+
+      // Four pooled connections are busy; the fifth update waits for one to come back
+      expect(mockTransactionRedis.watch).toHaveBeenCalledTimes(4)
+
+      commits.splice(0).forEach(commit => commit([[null, 'OK']]))
+      await new Promise(resolve => setImmediate(resolve))
+      commits.splice(0).forEach(commit => commit([[null, 'OK']]))
+
+      await expect(Promise.all(updates)).resolves.toHaveLength(5)
+      expect(mockTransactionRedis.watch).toHaveBeenCalledTimes(5)
+      mockTransaction.exec.mockReset()
+    })
+  })
+
+  describe('getCachedGreeting', () => {
+    it('returns the cached greeting without waiting on the usage update', async () => {
+      const greeting = { response: 'Hello', metadata: { usageCount: 1 } }
+      mockRedis.get.mockResolvedValue(JSON.stringify(greeting))
+      mockTransactionRedis.get.mockResolvedValue(JSON.stringify(greeting))
+
+      let commit: (value: unknown) => void = () => {}
+      mockTransaction.exec.mockReturnValueOnce(new Promise(resolve => { commit = resolve }))
+
+      // Resolves while the background transaction is still waiting on EXEC
+      await expect(service.getCachedGreeting('user-1', 'morning')).resolves.toEqual(greeting)
+
+      commit([[null, 'OK']])
+      await new Promise(resolve => setImmediate(resolve))
+      expect(mockTransaction.set).toHaveBeenCalledWith(
+        expect.any(String),
+        JSON.stringify({ ...greeting, metadata: { usageCount: 2 } }),
+        'KEEPTTL'
+      )
+    })
+
+    it('skips the usage update on a miss', async () => {
+      mockRedis.get.mockResolvedValue(null)
+
+      await expect(service.getCachedGreeting('user-1', 'evening')).resolves.toBeNull()
+      expect(mockTransactionRedis.watch).not.toHaveBeenCalled()
+    })
+  })
+})
@@ -1,5 +1,6 @@
 // Enhanced Smart Head Agent Endpoint with Redis, Upload Support, and Thinking
-import { NextRequest, NextResponse } from 'next/server'
+import { NextRequest, NextResponse, after } from 'next/server'
+import { randomUUID } from 'crypto'
 import { ContextAwareAgent } from '@/lib/agents/context-aware-agent'
 import { EnhancedSmartAgentRouter, UploadedFile } from '@/lib/agents/enhanced-agent-router'
 import { SmartHeadCacheService } from '@/lib/cache/redis-service'
@@ -167,12 +168,19 @@ async function handleEnhancedStreamingRequest(
               }
             }
           })}\n\n`))
+        }
+
+        // Send completion signal
+        controller.enqueue(encoder.encode(`data: [DONE]\n\n`))
+        controller.close()
 
-          // Store enhanced result with all metadata
-          if (userId && (result.sqlQuery || result.response || result.uploadAnalysis)) {
-            const messageId = Date.now().toString()
-            const storage = DatabaseMessageStorage.getInstance()
-            
+        // Store enhanced result with all metadata. The write runs after the response has
+        // finished so it doesn't keep the stream callback alive
+        if (userId && (result.sqlQuery || result.response || result.uploadAnalysis)) {
+          const messageId = randomUUID()
+          const storage = DatabaseMessageStorage.getInstance()
+          
+          after(async () => {
             try {
               await storage.store(messageId, userId, {
                 sqlQuery: result.sqlQuery,
@@ -197,12 +205,8 @@ async function handleEnhancedStreamingRequest(
             } catch (storageError) {
               console.error('Failed to store enhanced message data:', storageError)
             }
-          }
+          })
         }
-
-        // Send completion signal
-        controller.enqueue(encoder.encode(`data: [DONE]\n\n`))
-        controller.close()
       } catch (error) {
         console.error('Streaming error:', error)
         controller.enqueue(encoder.encode(`data: ${JSON.stringify({
@@ -299,36 +303,38 @@ export async function POST(request: NextRequest) {
         dataSource
       )
 
-      // Store enhanced evidence data including all new capabilities
+      // Store enhanced evidence data including all new capabilities. The write runs
+      // after the response has been sent so it doesn't add to the request latency
       if (result.sqlQuery || result.response || result.uploadAnalysis) {
-        const messageId = Date.now().toString()
+        const messageId = randomUUID()
         const storage = DatabaseMessageStorage.getInstance()
         
-        try {
-          await storage.store(messageId, userId, {
-            sqlQuery: result.sqlQuery,
-            responseData: {
-              content: result.response,
-              evidence: result.evidence || [],
-              insights: result.contextualInsights || [],
-              queryResults: result.queryResults || [],
-              dataSource: result.agentUsed,
-              query: latestMessage,
-              timestamp: new Date().toISOString(),
-              recordCount: result.queryResults?.length || 0,
-              enhanced: {
-                cached: result.cached || false,
-                uploads: uploads.map(u => ({ fileId: u.fileId, type: u.type })),
-                thinking: result.thinkingProcess,
-                memoryContext: result.memoryContext?.contextSummary,
-                followUpSuggestions: result.followUpSuggestions
+        after(async () => {
+          try {
+            await storage.store(messageId, userId, {
+              sqlQuery: result.sqlQuery,
+              responseData: {
+                content: result.response,
+                evidence: result.evidence || [],
+                insights: result.contextualInsights || [],
+                queryResults: result.queryResults || [],
+                dataSource: result.agentUsed,
+                query: latestMessage,
+                timestamp: new Date().toISOString(),
+                recordCount: result.queryResults?.length || 0,
+                enhanced: {
+                  cached: result.cached || false,
+                  uploads: uploads.map(u => ({ fileId: u.fileId, type: u.type })),
+                  thinking: result.thinkingProcess,
+                  memoryContext: result.memoryContext?.contextSummary,
+                  followUpSuggestions: result.followUpSuggestions
+                }
               }
-            }
-          })
-        } catch (storageError) {
-          console.error('Failed to store enhanced message data:', storageError)
-          // Continue without storage (non-critical)
-        }
+            })
+          } catch (storageError) {
+            console.error('Failed to store enhanced message data:', storageError)
+          }
+        })
       }
 
       return NextResponse.json({
@@ -1,4 +1,5 @@
 import { NextResponse } from "next/server"
+import { randomUUID } from "crypto"
 import { unifiedStorage } from '@/lib/storage/unified-storage'
 
 export async function POST(req: Request) {
@@ -61,7 +62,7 @@ export async function POST(req: Request) {
     const agentData = await agentResponse.json()
 
     // Generate a unique message ID for storage
-    const messageId = `msg_${Date.now()}_${Math.random().toString(36).substr(2, 9)}`
+    const messageId = `msg_${Date.now()}_${randomUUID()}`
     
     // Store the SQL query and response data for evidence retrieval
     if (agentData.sqlQuery) {
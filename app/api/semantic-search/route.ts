@@ -2,6 +2,7 @@
 import { NextRequest, NextResponse } from 'next/server'
 import { SemanticSearchService } from '@/lib/semantic-search'
 import { auth } from '@clerk/nextjs/server'
+import { Database } from '@/lib/database'
 
 export async function POST(request: NextRequest) {
   try {
@@ -179,41 +180,25 @@ export async function GET() {
 
 // Helper functions
 async function getRecordsByIds(table: string, recordIds: number[]) {
-  const { Pool } = require('pg')
-  const pool = new Pool({ connectionString: process.env.DATABASE_URL })
-  const client = await pool.connect()
-
-  try {
-    const placeholders = recordIds.map((_, i) => `$${i + 1}`).join(',')
-    const result = await client.query(
-      `SELECT * FROM ${table} WHERE id IN (${placeholders})`,
-      recordIds
-    )
-    return result.rows
-  } finally {
-    client.release()
-  }
+  const placeholders = recordIds.map((_, i) => `$${i + 1}`).join(',')
+  const result = await Database.query(
+    `SELECT * FROM ${table} WHERE id IN (${placeholders})`,
+    recordIds
+  )
+  return result.rows
 }
 
 async function getRecordsWithoutEmbeddings(table: string, limit: number = 1000) {
-  const { Pool } = require('pg')
-  const pool = new Pool({ connectionString: process.env.DATABASE_URL })
-  const client = await pool.connect()
-
-  try {
-    let whereClause = ''
-    if (table === 'baanspending') {
-      whereClause = 'WHERE supplier_embedding IS NULL OR commodity_embedding IS NULL OR combined_text_embedding IS NULL'
-    } else if (table === 'financial_data') {
-      whereClause = 'WHERE entity_embedding IS NULL OR cost_group_embedding IS NULL OR account_embedding IS NULL OR cost_center_embedding IS NULL OR combined_text_embedding IS NULL'
-    }
-
-    const result = await client.query(
-      `SELECT * FROM ${table} ${whereClause} LIMIT $1`,
-      [limit]
-    )
-    return result.rows
-  } finally {
-    client.release()
+  let whereClause = ''
+  if (table === 'baanspending') {
+    whereClause = 'WHERE supplier_embedding IS NULL OR commodity_embedding IS NULL OR combined_text_embedding IS NULL'
+  } else if (table === 'financial_data') {
+    whereClause = 'WHERE entity_embedding IS NULL OR cost_group_embedding IS NULL OR account_embedding IS NULL OR cost_center_embedding IS NULL OR combined_text_embedding IS NULL'
   }
-}
\ No newline at end of file
+
+  const result = await Database.query(
+    `SELECT * FROM ${table} ${whereClause} LIMIT $1`,
+    [limit]
+  )
+  return result.rows
+}
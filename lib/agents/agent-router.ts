@@ -5,6 +5,27 @@ import { BaanProcurementAgent } from './baan-agent'
 import { SimpleFinancialTransactionAgent } from './simple-agent'
 import { RouterResult, ClassificationResult } from '@/lib/types'
 
+// The classifier and data-source agents keep no per-request state, so every router
+// shares one set rather than rebuilding their Gemini clients and error handlers per request
+let sharedAgents: {
+  classifier: QueryClassifier
+  coupaAgent: CoupaFinancialAgent
+  baanAgent: BaanProcurementAgent
+  fallbackAgent: SimpleFinancialTransactionAgent
+} | null = null
+
+function getSharedAgents() {
+  if (!sharedAgents) {
+    sharedAgents = {
+      classifier: new QueryClassifier(),
+      coupaAgent: new CoupaFinancialAgent(),
+      baanAgent: new BaanProcurementAgent(),
+      fallbackAgent: new SimpleFinancialTransactionAgent()
+    }
+  }
+  return sharedAgents
+}
+
 export class SmartAgentRouter {
   private classifier: QueryClassifier
   private coupaAgent: CoupaFinancialAgent
@@ -12,10 +33,11 @@ export class SmartAgentRouter {
   private fallbackAgent: SimpleFinancialTransactionAgent
 
   constructor() {
-    this.classifier = new QueryClassifier()
-    this.coupaAgent = new CoupaFinancialAgent()
-    this.baanAgent = new BaanProcurementAgent()
-    this.fallbackAgent = new SimpleFinancialTransactionAgent()
+    const agents = getSharedAgents()
+    this.classifier = agents.classifier
+    this.coupaAgent = agents.coupaAgent
+    this.baanAgent = agents.baanAgent
+    this.fallbackAgent = agents.fallbackAgent
   }
 
   async routeQuery(query: string, requestedDataSource?: 'coupa' | 'baan' | 'combined'): Promise<RouterResult> {
@@ -31,13 +31,14 @@ export class BaanProcurementAgent {
 
   private async executeWorkflow(state: BaanAgentState): Promise<BaanAgentState> {
     try {
-      // Generate thinking process first
-      const thinkingState = await this.generateThinkingProcess(state)
-      
-      const processedState = await this.processProcurementQuery({ ...state, ...thinkingState })
+      // The thinking trace, business narrative and SQL prompts only read the query,
+      // so issue the three Gemini calls together rather than one after another
+      const [thinkingState, processedState, sqlState] = await Promise.all([
+        this.generateThinkingProcess(state),
+        this.processProcurementQuery(state),
+        this.generateBaanSQL(state)
+      ])
       if (processedState.error) return { ...state, ...thinkingState, ...processedState }
-
-      const sqlState = await this.generateBaanSQL({ ...state, ...thinkingState, ...processedState })
       if (sqlState.error) return { ...state, ...thinkingState, ...processedState, ...sqlState }
 
       const executionState = await this.executeSQL({ ...state, ...thinkingState, ...processedState, ...sqlState })
@@ -525,7 +526,12 @@ Generate production-ready SQL with CPO-level procurement intelligence, focusing
   private applyCurrencyValidation(results: any[]): any[] {
     if (!results || results.length === 0) return results
 
-    return results.map(row => {
+    // Count fixes and log once per result set - pg returns DECIMAL columns as strings,
+    // so logging per cell meant a console line for nearly every financial value
+    let correctedCount = 0
+    const zeroValueFields = new Set<string>()
+
+    const correctedResults = results.map(row => {
       const correctedRow = { ...row }
       
       // Check each field for currency-related issues
@@ -535,19 +541,28 @@ Generate production-ready SQL with CPO-level procurement intelligence, focusing
           
           // Fix critical "$0.0M" calculation errors
           if (parseResult.isValid && parseResult.value !== value) {
-            console.log(`🔧 BAAN CURRENCY FIX: ${key} corrected from "${value}" to ${parseResult.value}`)
             correctedRow[key] = parseResult.value
+            correctedCount++
           }
           
           // Handle zero values that should likely be non-zero
           if (parseResult.value === 0 && typeof value === 'string' && value.includes('$')) {
-            console.log(`⚠️ BAAN ZERO VALUE WARNING: ${key} shows "$0" but may need recalculation`)
+            zeroValueFields.add(key)
           }
         }
       }
       
       return correctedRow
     })
+
+    if (correctedCount > 0) {
+      console.log(`🔧 BAAN CURRENCY FIX: corrected ${correctedCount} values across ${results.length} rows`)
+    }
+    if (zeroValueFields.size > 0) {
+      console.log(`⚠️ BAAN ZERO VALUE WARNING: ${Array.from(zeroValueFields).join(', ')} show "$0" but may need recalculation`)
+    }
+
+    return correctedResults
   }
 
   /**
@@ -17,6 +17,8 @@ export interface ContextAwareResponse extends EnhancedRouterResult {
 export class ContextAwareAgent {
   private router: EnhancedSmartAgentRouter
   private contextManager: ConversationContextManager
+  // Pending learning step per conversation, so overlapping queries take turns
+  private learningQueue: Map<string, Promise<void>> = new Map()
 
   constructor() {
     this.router = new EnhancedSmartAgentRouter()
@@ -41,7 +43,7 @@ export class ContextAwareAgent {
       const routerResult = await this.router.routeWithCache(enhancedQuery, [], userId, conversationId, requestedDataSource)
       
       // Step 4: Learn from interaction and update context
-      await this.learnFromInteraction(userId, conversationId, query, routerResult, context)
+      await this.learnFromInteraction(userId, conversationId, query, routerResult)
       
       // Step 5: Generate contextual enhancements
       const contextualInsights = await this.generateContextualInsights(routerResult, context)
@@ -100,7 +102,7 @@ export class ContextAwareAgent {
         enhancedResult.followUpSuggestions = await this.generateFollowUpSuggestions(query, result, context)
         
         // Learn from successful interaction
-        await this.learnFromInteraction(userId, conversationId, query, result, context)
+        await this.learnFromInteraction(userId, conversationId, query, result)
       }
       
       yield enhancedResult
@@ -127,14 +129,35 @@ export class ContextAwareAgent {
     return query
   }
 
-  private async learnFromInteraction(
+  // Learning is a read-modify-write of the conversation context (message count, usage
+  // tallies), so queries sharing a conversation - e.g. a bulk insight job - are applied
+  // one at a time against the latest context rather than the snapshot each query started from
+  private learnFromInteraction(
     userId: string,
     conversationId: string,
     query: string,
-    result: RouterResult,
-    context: ConversationContext
+    result: RouterResult
+  ): Promise<void> {
+    const key = `${userId}:${conversationId}`
+    const previous = this.learningQueue.get(key) || Promise.resolve()
+    const next = previous.then(() => this.applyLearning(userId, conversationId, query, result))
+
+    this.learningQueue.set(key, next)
+    next.finally(() => {
+      if (this.learningQueue.get(key) === next) this.learningQueue.delete(key)
+    })
+    return next
+  }
+
+  private async applyLearning(
+    userId: string,
+    conversationId: string,
+    query: string,
+    result: RouterResult
   ): Promise<void> {
     try {
+      const context = await this.contextManager.getConversationContext(userId, conversationId)
+
       // Update conversation metrics
       const updates: Partial<ConversationContext> = {
         messageCount: context.messageCount + 1,
@@ -23,6 +23,7 @@ export interface EnhancedRouterResult extends RouterResult {
   memoryContext?: any
   followUpSuggestions?: string[]
   contextualInsights?: string[]
+  degraded?: boolean // Produced by the basic-routing fallback after enhanced processing failed
 }
 
 export interface UploadClassificationResult {
@@ -223,8 +224,9 @@ UPLOAD PROCESSING:
       this.memoryCoordinator = new MemoryCoordinator(userId, conversationId)
     }
 
-    // Check cache first for similar queries
-    const queryHash = generateQueryHash(query, uploads, { userId, requestedDataSource })
+    // Check cache first for similar queries. The answer draws on this conversation's memory
+    // context, so the same question in another conversation gets its own entry
+    const queryHash = generateQueryHash(query, uploads, { userId, conversationId, requestedDataSource })
     const cached = await this.cache.getCachedRoute(queryHash)
     
     if (cached && this.isCacheValid(cached)) {
@@ -246,9 +248,12 @@ UPLOAD PROCESSING:
       requestedDataSource
     )
     
-    // Cache result with appropriate TTL
-    const cacheTTL = this.determineCacheTTL(result, uploads)
-    await this.cache.cacheRoute(queryHash, result, cacheTTL)
+    // Cache result with appropriate TTL, in the { result, timestamp } shape the lookup above expects.
+    // Failures and fallback answers aren't cached so the next ask gets a real attempt.
+    if (result.success && !result.error && !result.degraded) {
+      const cacheTTL = this.determineCacheTTL(result, uploads)
+      await this.cache.cacheRoute(queryHash, { result, timestamp: new Date().toISOString() }, cacheTTL)
+    }
     
     return {
       ...result,
@@ -265,14 +270,13 @@ UPLOAD PROCESSING:
     requestedDataSource?: 'coupa' | 'baan' | 'combined'
   ): Promise<EnhancedRouterResult> {
     try {
-      // Get memory context if available
-      const memoryContext = await this.getMemoryContext(userId, conversationId, query)
-      
-      // Classify query with upload awareness
-      const classification = await this.classifyWithUploads(query, uploads, userId, conversationId)
-      
-      // Process uploads if present
-      const uploadAnalysis = await this.processUploads(uploads, query)
+      // Memory lookup, upload-aware classification and upload processing don't depend on
+      // each other, so run them concurrently instead of paying for each LLM call in turn
+      const [memoryContext, classification, uploadAnalysis] = await Promise.all([
+        this.getMemoryContext(userId, conversationId, query),
+        this.classifyWithUploads(query, uploads, userId, conversationId),
+        this.processUploads(uploads, query)
+      ])
       
       // Enhanced context for agent processing
       const enhancedContext = {
@@ -331,7 +335,8 @@ UPLOAD PROCESSING:
         ...fallbackResult,
         uploadAnalysis: [],
         contextualInsights: ['Enhanced processing unavailable - using basic analysis'],
-        followUpSuggestions: []
+        followUpSuggestions: [],
+        degraded: true
       }
     }
   }
@@ -339,8 +344,9 @@ UPLOAD PROCESSING:
   private async processUploads(uploads: UploadedFile[], query: string): Promise<any[]> {
     if (uploads.length === 0) return []
 
-    const analysis = []
-    for (const upload of uploads) {
+    // Each upload is analysed independently, so fan the Gemini calls out instead of
+    // paying one round trip per file back to back
+    return Promise.all(uploads.map(async (upload) => {
       try {
         // Get cached processing result or process
         const cacheKey = `upload_analysis:${upload.fileId}`
@@ -357,24 +363,22 @@ UPLOAD PROCESSING:
           await this.cache.safeSet(cacheKey, uploadResult, 3600) // 1 hour cache
         }
         
-        analysis.push({
+        return {
           fileId: upload.fileId,
           type: upload.type,
           analysis: uploadResult,
           relevanceToQuery: this.assessRelevance(uploadResult, query)
-        })
+        }
       } catch (error) {
         console.error(`Failed to process upload ${upload.fileId}:`, error)
-        analysis.push({
+        return {
           fileId: upload.fileId,
           type: upload.type,
           error: 'Processing failed',
           relevanceToQuery: 0
-        })
+        }
       }
-    }
-
-    return analysis
+    }))
   }
 
   private async getMemoryContext(userId?: string, conversationId?: string, query?: string): Promise<any> {
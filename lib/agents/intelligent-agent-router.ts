@@ -5,6 +5,9 @@ import { SemanticCatalog } from '../semantic-catalog'
 import { SmartHeadCacheService } from '../cache/redis-service'
 import { CollaborativeAgentFramework, CollaborativeQuery } from './collaborative-agent-framework'
 
+// Score patterns are compiled once per dimension instead of on every parse
+const SCORE_PATTERNS = new Map<string, RegExp>()
+
 export interface QueryComplexityAnalysis {
   overallComplexity: 'simple' | 'moderate' | 'complex' | 'expert'
   dimensions: {
@@ -600,7 +603,12 @@ CONFIDENCE: 0.X`
   }
 
   private extractScore(text: string, dimension: string): number | null {
-    const match = text.match(new RegExp(`${dimension}:\\s*([0-9.]+)`, 'i'))
+    let pattern = SCORE_PATTERNS.get(dimension)
+    if (!pattern) {
+      pattern = new RegExp(`${dimension}:\\s*([0-9.]+)`, 'i')
+      SCORE_PATTERNS.set(dimension, pattern)
+    }
+    const match = text.match(pattern)
     return match ? Math.max(0, Math.min(1, parseFloat(match[1]))) : null
   }
 
@@ -1,20 +1,29 @@
 // Intelligent Query Classification System for Coupa/Baan Data Sources
 import { GoogleGenAI } from '@google/genai'
 import { DataSourceType, ClassificationResult } from '@/lib/types'
+import { SmartHeadCacheService, generateQueryHash } from '@/lib/cache/redis-service'
 
 export type DataSourceClassification = DataSourceType
 
 export class QueryClassifier {
   private ai: GoogleGenAI
+  private cache: SmartHeadCacheService
 
   constructor() {
     this.ai = new GoogleGenAI({ 
       apiKey: process.env.GEMINI_API_KEY || process.env.GOOGLE_API_KEY || "" 
     })
+    this.cache = SmartHeadCacheService.getInstance()
   }
 
   async classifyQuery(query: string): Promise<ClassificationResult> {
     try {
+      // The routing decision depends only on the question text, so repeats of the
+      // same question (ignoring case and spacing) skip the model call entirely
+      const queryHash = generateQueryHash(query.trim().toLowerCase().replace(/\s+/g, ' '))
+      const cached = await this.cache.getCachedClassification(queryHash)
+      if (cached) return cached
+
       const classificationPrompt = `
 SMART HEAD QUERY CLASSIFICATION - MULTI-DATASET ANALYTICS EXPERT
 
@@ -81,18 +90,27 @@ RESPONSE FORMAT (JSON):
 
 Analyze the query and provide classification with high confidence. Focus on key domain indicators and business context.`
 
+      // Routing is a small structured pick between three labels, so use the lite model
+      // with deterministic JSON output rather than the full flash model
       const response = await this.ai.models.generateContent({
-        model: "gemini-2.5-flash",
-        contents: classificationPrompt
+        model: "gemini-2.5-flash-lite-preview-09-2025",
+        contents: classificationPrompt,
+        config: {
+          temperature: 0,
+          responseMimeType: "application/json"
+        }
       })
 
-      const result = this.parseClassificationResponse(response.text || '')
+      const text = response.text || ''
+      const result = this.parseClassificationResponse(text)
       
-      // Apply fallback logic if parsing fails
-      if (!result.dataSource) {
-        return this.fallbackClassification(query)
+      // Apply fallback logic if parsing fails. Only a result the model actually returned
+      // as JSON is cached, so one malformed response can't pin a route for a day.
+      if (!result) {
+        return text ? this.extractClassificationFromText(text) : this.fallbackClassification(query)
       }
 
+      await this.cache.cacheClassification(queryHash, result)
       return result
     } catch (error) {
       console.error('Query classification error:', error)
@@ -100,14 +118,17 @@ Analyze the query and provide classification with high confidence. Focus on key
     }
   }
 
-  private parseClassificationResponse(text: string): ClassificationResult {
+  // Returns null unless the response holds JSON naming a known data source
+  private parseClassificationResponse(text: string): ClassificationResult | null {
     try {
       // Try to extract JSON from the response
       const jsonMatch = text.match(/\{[\s\S]*\}/)
       if (jsonMatch) {
         const parsed = JSON.parse(jsonMatch[0])
+        if (!['coupa', 'baan', 'combined'].includes(parsed.dataSource)) return null
+
         return {
-          dataSource: parsed.dataSource || 'coupa',
+          dataSource: parsed.dataSource,
           confidence: parsed.confidence || 75,
           reasoning: parsed.reasoning || 'Auto-classified based on content analysis',
           keyTerms: parsed.keyTerms || [],
@@ -115,11 +136,10 @@ Analyze the query and provide classification with high confidence. Focus on key
         }
       }
 
-      // Fallback parsing if JSON structure is not clear
-      return this.extractClassificationFromText(text)
+      return null
     } catch (error) {
       console.error('Classification parsing error:', error)
-      return this.fallbackClassification('')
+      return null
     }
   }
 
@@ -18,6 +18,7 @@ export interface StreamingConfig {
 
 // AI Gateway Configuration with intelligent model routing and streaming via Vercel AI Gateway
 export class AIGatewayClient {
+  private static instance: AIGatewayClient | null = null
   private apiKey: string
   // private mcpClient: any = null // MCP support coming soon
 
@@ -29,6 +30,14 @@ export class AIGatewayClient {
     }
   }
 
+  // Created on first use so importing this module doesn't require AI_GATEWAY_API_KEY
+  static getInstance(): AIGatewayClient {
+    if (!AIGatewayClient.instance) {
+      AIGatewayClient.instance = new AIGatewayClient()
+    }
+    return AIGatewayClient.instance
+  }
+
   // Get optimal model based on context size and complexity with GPT-5 Mini as primary
   getModel(contextSize?: number, useHighContext?: boolean) {
     // Use xAI Grok-4 for large contexts or file processing (2M context window)
@@ -131,6 +140,3 @@ export class AIGatewayClient {
     return steps
   }
 }
-
-// Global instance
-export const aiGateway = new AIGatewayClient()
@@ -2,6 +2,10 @@
 import { ContextAwareAgent } from './agents/context-aware-agent'
 import { EnhancedSmartAgentRouter } from './agents/enhanced-agent-router'
 import Database from './database'
+import { randomUUID } from 'crypto'
+
+// Analysis queries a single bulk job runs at once
+const BULK_QUERY_CONCURRENCY = 3
 
 export interface BulkInsightRequest {
   userId: string
@@ -215,29 +219,43 @@ export class BulkInsightOrchestrator {
 
   // Orchestrate analysis based on request type
   private async orchestrateAnalysis(request: BulkInsightRequest, jobId: string): Promise<InsightSection[]> {
-    const insights: InsightSection[] = []
     const analysisQueries = this.generateAnalysisQueries(request)
-
-    for (const queryConfig of analysisQueries) {
-      try {
-        const result = await this.contextAgent.processQuery(
-          queryConfig.query,
-          request.userId,
-          request.conversationId || jobId,
-          queryConfig.dataSource
-        )
-
-        if (result.success && result.response) {
-          const insight = await this.transformToInsight(result, queryConfig)
-          insights.push(insight)
+    const results: Array<InsightSection | null> = new Array(analysisQueries.length).fill(null)
+    let nextIndex = 0
+
+    // Run a few queries at a time instead of one after another. The model and SQL work is
+    // independent, but every query shares the job's conversation, so ContextAwareAgent applies
+    // their context learning one at a time; a query still won't see context from its siblings.
+    // The cap keeps a single job from exhausting the Gemini rate limit or the pg pool.
+    const worker = async () => {
+      while (nextIndex < analysisQueries.length) {
+        const index = nextIndex++
+        const queryConfig = analysisQueries[index]
+
+        try {
+          const result = await this.contextAgent.processQuery(
+            queryConfig.query,
+            request.userId,
+            request.conversationId || jobId,
+            queryConfig.dataSource
+          )
+
+          if (result.success && result.response) {
+            results[index] = await this.transformToInsight(result, queryConfig)
+          }
+        } catch (error) {
+          console.error(`Failed to process query: ${queryConfig.query}`, error)
+          // Continue with other queries even if one fails
         }
-      } catch (error) {
-        console.error(`Failed to process query: ${queryConfig.query}`, error)
-        // Continue with other queries even if one fails
       }
     }
 
-    return insights
+    await Promise.all(
+      Array.from({ length: Math.min(BULK_QUERY_CONCURRENCY, analysisQueries.length) }, worker)
+    )
+
+    // Keep insights in the order the queries were planned
+    return results.filter((insight): insight is InsightSection => insight !== null)
   }
 
   // Streaming analysis version
@@ -581,7 +599,7 @@ export class BulkInsightOrchestrator {
 
   // Job management methods
   private generateJobId(): string {
-    return `bulk_${Date.now()}_${Math.random().toString(36).substr(2, 9)}`
+    return `bulk_${Date.now()}_${randomUUID()}`
   }
 
   private async storeJob(job: BulkInsightResult): Promise<void> {
@@ -1,10 +1,13 @@
 // Enhanced Redis Cache Service for Smart Head Platform
 import Redis from 'ioredis'
+import { gzipSync, gunzipSync, constants as zlibConstants } from 'zlib'
+import { createHash } from 'crypto'
 
 export interface CacheConfig {
   redis: {
     host: string
     port: number
+    socketPath?: string  // Unix domain socket, used instead of host/port when set
     password?: string
     db: number
     ttl: {
@@ -14,6 +17,7 @@ export interface CacheConfig {
       reports: number      // 4 hours for generated reports
       embeddings: number   // 30 days for vector embeddings
       charts: number       // 2 hours for chart configs
+      classifications: number // 24 hours for query routing decisions
     }
   }
 }
@@ -29,9 +33,27 @@ export const CACHE_PATTERNS = {
   CHART_CONFIG: 'chart:',
   BULK_INSIGHTS: 'insights:bulk:',
   THINKING_CACHE: 'thinking:',
-  ROUTE_CACHE: 'route:'
+  ROUTE_CACHE: 'route:',
+  CLASSIFICATION: 'classify:'
 } as const
 
+// Delay before retrying a command while ioredis is mid-reconnect
+const RECONNECT_RETRY_DELAY_MS = 100
+
+// Optimistic-lock retries for safeUpdate before giving up on a contended key
+const MAX_UPDATE_ATTEMPTS = 3
+
+// Dedicated connections for safeUpdate's WATCH/MULTI; updates beyond this many wait for one to free up
+const TRANSACTION_POOL_SIZE = 4
+
+// Payloads above this many characters (long conversations, large result sets) are gzipped before
+// going to Redis. The prefix can't start a JSON document, so plain values still read fine.
+const COMPRESSION_THRESHOLD_CHARS = 8 * 1024
+const COMPRESSED_PREFIX = 'gz:'
+
+// Only the most recent messages are kept in a cached conversation so long sessions stay bounded
+const MAX_CACHED_CONVERSATION_MESSAGES = 200
+
 export interface CachedQuery {
   sqlHash: string
   results: any[]
@@ -68,16 +90,25 @@ export interface GreetingCache {
 
 export class SmartHeadCacheService {
   private redis: Redis | null = null
+  // WATCH state belongs to the connection, so each optimistic transaction borrows a
+  // connection of its own from a small pool of duplicated clients
+  private transactionClients: Redis[] = []
+  private idleTransactionClients: Redis[] = []
+  private transactionWaiters: Array<(redis: Redis) => void> = []
   private config: CacheConfig['redis']
   private inMemoryCache: Map<string, { value: any, expiry: number }> = new Map()
   private isRedisAvailable: boolean = false
+  // Settles once the deferred connection attempt in initializeRedis has finished
+  private initialized: Promise<void>
   private maxMemoryCacheSize: number = 1000 // Limit in-memory cache size
 
-  constructor() {
+  // Private so every caller shares the one ioredis connection via getInstance()
+  private constructor() {
     // Initialize Redis with environment variables or defaults
     this.config = {
       host: process.env.REDIS_HOST || 'localhost',
       port: parseInt(process.env.REDIS_PORT || '6379'),
+      socketPath: process.env.REDIS_SOCKET_PATH,
       password: process.env.REDIS_PASSWORD,
       db: parseInt(process.env.REDIS_DB || '0'),
       ttl: {
@@ -86,27 +117,36 @@ export class SmartHeadCacheService {
         greetings: 604800,  // 7 days
         reports: 14400,     // 4 hours
         embeddings: 2592000, // 30 days
-        charts: 7200        // 2 hours
+        charts: 7200,       // 2 hours
+        classifications: 86400 // 24 hours
       }
     }
 
-    this.initializeRedis()
+    this.initialized = this.initializeRedis()
   }
 
-  private async initializeRedis() {
+  private initializeRedis(): Promise<void> {
     // Don't block constructor - initialize async
-    setTimeout(async () => {
+    return new Promise(resolve => setTimeout(async () => {
       try {
         this.redis = new Redis({
-          host: this.config.host,
-          port: this.config.port,
+          // A co-located Redis is cheaper to reach over a Unix socket than TCP loopback
+          ...(this.config.socketPath
+            ? { path: this.config.socketPath }
+            : { host: this.config.host, port: this.config.port }),
           password: this.config.password,
           db: this.config.db,
           maxRetriesPerRequest: 0, // No retries to fail fast
           lazyConnect: true,
           connectTimeout: 500, // Very short timeout
           commandTimeout: 500,  // Very short timeout
-          retryDelayOnFailover: 100
+          retryDelayOnFailover: 100,
+          // Keep the shared socket warm so a quiet spell doesn't get it dropped by a
+          // proxy or NAT and force a fresh connect (and TLS handshake) on the next command
+          keepAlive: 30000,
+          // Every caller shares this one connection, so batch commands issued in the same
+          // tick into a single write. safeUpdate's WATCH/MULTI runs on pooled connections of its own.
+          enableAutoPipelining: true
         })
 
         this.redis.on('connect', () => {
@@ -114,10 +154,15 @@ export class SmartHeadCacheService {
           this.isRedisAvailable = true
         })
 
+        // ioredis keeps reconnecting in the background, so keep the client around
+        // and just route traffic to memory until it is ready again
+        this.redis.on('ready', () => {
+          this.isRedisAvailable = true
+        })
+
         this.redis.on('error', () => {
           // Silent fallback to in-memory
           this.isRedisAvailable = false
-          this.redis = null
         })
 
         // Test connection with timeout
@@ -129,77 +174,250 @@ export class SmartHeadCacheService {
         await Promise.race([connectPromise, timeoutPromise])
         this.isRedisAvailable = true
       } catch (error) {
-        // Silent fallback to in-memory cache
+        // Redis isn't reachable at startup - stop reconnect attempts and stay in-memory
         this.isRedisAvailable = false
+        this.redis?.disconnect()
         this.redis = null
       }
-    }, 0)
+      resolve()
+    }, 0))
+  }
+
+  // Run a Redis command, reconnecting and retrying once if the connection dropped
+  private async runCommand<T>(command: (redis: Redis) => Promise<T>): Promise<T> {
+    const redis = this.redis
+    if (!redis) throw new Error('Redis client not initialized')
+
+    try {
+      return await command(redis)
+    } catch (error) {
+      if (redis.status === 'ready') throw error
+
+      if (redis.status === 'end' || redis.status === 'wait') {
+        await redis.connect()
+      } else {
+        // Already reconnecting - give it a moment before the single retry
+        await new Promise(resolve => setTimeout(resolve, RECONNECT_RETRY_DELAY_MS))
+      }
+      return command(redis)
+    }
+  }
+
+  // Run a WATCH/MULTI/EXEC sequence on a pooled transaction connection. Sharing the
+  // auto-pipelined client would let one caller's EXEC or UNWATCH clear another caller's
+  // WATCH, turning the second EXEC into an unconditional write over a stale read.
+  private async runTransaction<T>(work: (redis: Redis) => Promise<T>): Promise<T> {
+    const redis = await this.acquireTransactionClient()
+    try {
+      return await work(redis)
+    } catch (error) {
+      // Don't leave a WATCH behind for the next transaction on this connection
+      await redis.unwatch().catch(() => undefined)
+      throw error
+    } finally {
+      this.releaseTransactionClient(redis)
+    }
+  }
+
+  private acquireTransactionClient(): Promise<Redis> {
+    const idle = this.idleTransactionClients.pop()
+    if (idle) return Promise.resolve(idle)
+
+    if (this.transactionClients.length < TRANSACTION_POOL_SIZE) {
+      if (!this.redis) return Promise.reject(new Error('Redis client not initialized'))
+      const redis = this.redis.duplicate({ enableAutoPipelining: false })
+      // Errors surface on the command promises; don't let them go unhandled
+      redis.on('error', () => {})
+      this.transactionClients.push(redis)
+      return Promise.resolve(redis)
+    }
+
+    return new Promise(resolve => this.transactionWaiters.push(resolve))
+  }
+
+  private releaseTransactionClient(redis: Redis): void {
+    const waiter = this.transactionWaiters.shift()
+    if (waiter) {
+      waiter(redis)
+    } else {
+      this.idleTransactionClients.push(redis)
+    }
   }
 
   private generateKey(pattern: string, ...parts: string[]): string {
     return pattern + parts.join(':')
   }
 
+  private serialize(value: any): string {
+    const json = JSON.stringify(value)
+    if (json.length < COMPRESSION_THRESHOLD_CHARS) return json
+
+    const compressed = gzipSync(json, { level: zlibConstants.Z_BEST_SPEED })
+    return COMPRESSED_PREFIX + compressed.toString('base64')
+  }
+
+  private deserialize<T>(raw: string): T {
+    if (raw.startsWith(COMPRESSED_PREFIX)) {
+      const compressed = Buffer.from(raw.slice(COMPRESSED_PREFIX.length), 'base64')
+      return JSON.parse(gunzipSync(compressed).toString('utf8')) as T
+    }
+    return JSON.parse(raw) as T
+  }
+
   async safeSet(key: string, value: any, ttl?: number): Promise<boolean> {
     try {
       if (this.isRedisAvailable && this.redis) {
-        const serialized = JSON.stringify(value)
+        const serialized = this.serialize(value)
         if (ttl) {
-          await this.redis.setex(key, ttl, serialized)
+          await this.runCommand(redis => redis.setex(key, ttl, serialized))
         } else {
-          await this.redis.set(key, serialized)
+          await this.runCommand(redis => redis.set(key, serialized))
         }
         return true
-      } else {
-        // Fallback to in-memory cache
-        this.cleanupMemoryCache()
-        const expiry = ttl ? Date.now() + (ttl * 1000) : Date.now() + (3600 * 1000)
-        this.inMemoryCache.set(key, { value, expiry })
-        return true
       }
     } catch (error) {
-      // Fallback to in-memory cache on Redis error
-      this.isRedisAvailable = false
-      this.cleanupMemoryCache()
-      const expiry = ttl ? Date.now() + (ttl * 1000) : Date.now() + (3600 * 1000)
-      this.inMemoryCache.set(key, { value, expiry })
-      return true
+      // Fall through to the in-memory cache on Redis error
+      this.isRedisAvailable = this.redis?.status === 'ready'
     }
+
+    this.setInMemory(key, value, ttl)
+    return true
   }
 
   async safeGet<T>(key: string): Promise<T | null> {
     try {
       if (this.isRedisAvailable && this.redis) {
-        const cached = await this.redis.get(key)
+        const cached = await this.runCommand(redis => redis.get(key))
         if (!cached) return null
-        return JSON.parse(cached) as T
-      } else {
-        // Fallback to in-memory cache
-        const cached = this.inMemoryCache.get(key)
-        if (!cached) return null
-        
-        // Check expiry
-        if (Date.now() > cached.expiry) {
-          this.inMemoryCache.delete(key)
-          return null
+        return this.deserialize<T>(cached)
+      }
+    } catch (error) {
+      // Fall through to the in-memory cache on Redis error
+      this.isRedisAvailable = this.redis?.status === 'ready'
+    }
+
+    return this.getFromMemory<T>(key)
+  }
+
+  private setInMemory(key: string, value: any, ttl?: number): void {
+    this.cleanupMemoryCache()
+    const expiry = ttl ? Date.now() + (ttl * 1000) : Date.now() + (3600 * 1000)
+    this.inMemoryCache.set(key, { value, expiry })
+  }
+
+  private getFromMemory<T>(key: string): T | null {
+    const cached = this.inMemoryCache.get(key)
+    if (!cached) return null
+    
+    // Check expiry
+    if (Date.now() > cached.expiry) {
+      this.inMemoryCache.delete(key)
+      return null
+    }
+    
+    return cached.value as T
+  }
+
+  // Fetch several keys in one round trip; entries line up with `keys`, null where missing
+  async safeMGet<T>(keys: string[]): Promise<(T | null)[]> {
+    if (keys.length === 0) return []
+
+    try {
+      if (this.isRedisAvailable && this.redis) {
+        const cached = await this.runCommand(redis => redis.mget(...keys))
+        return cached.map(raw => raw ? this.deserialize<T>(raw) : null)
+      }
+    } catch (error) {
+      this.isRedisAvailable = this.redis?.status === 'ready'
+    }
+
+    return keys.map(key => this.getFromMemory<T>(key))
+  }
+
+  // Write several entries with the same TTL in a single pipeline
+  async safeMSet(entries: Array<[string, any]>, ttl?: number): Promise<boolean> {
+    if (entries.length === 0) return true
+
+    try {
+      if (this.isRedisAvailable && this.redis) {
+        const results = await this.runCommand(redis => {
+          const pipeline = redis.pipeline()
+          for (const [key, value] of entries) {
+            const serialized = this.serialize(value)
+            if (ttl) {
+              pipeline.setex(key, ttl, serialized)
+            } else {
+              pipeline.set(key, serialized)
+            }
+          }
+          return pipeline.exec()
+        })
+
+        // exec() resolves even when individual commands fail, reporting each as an
+        // [err, result] tuple - keep whichever entries Redis rejected in memory instead
+        const failed = results
+          ? entries.filter((_, index) => results[index]?.[0])
+          : entries
+        for (const [key, value] of failed) {
+          this.setInMemory(key, value, ttl)
         }
-        
-        return cached.value as T
+        return true
       }
     } catch (error) {
-      // Fallback to in-memory cache on Redis error
-      this.isRedisAvailable = false
-      const cached = this.inMemoryCache.get(key)
-      if (!cached) return null
-      
-      // Check expiry
-      if (Date.now() > cached.expiry) {
-        this.inMemoryCache.delete(key)
-        return null
+      this.isRedisAvailable = this.redis?.status === 'ready'
+    }
+
+    for (const [key, value] of entries) {
+      this.setInMemory(key, value, ttl)
+    }
+    return true
+  }
+
+  // Atomic read-modify-write: WATCH the key, apply the updater and commit with MULTI/EXEC,
+  // retrying if another writer got there first. Returning null from the updater skips the write.
+  // Without a ttl the key keeps its remaining TTL (KEEPTTL) instead of being reset.
+  async safeUpdate<T>(key: string, updater: (current: T | null) => T | null, ttl?: number): Promise<T | null> {
+    try {
+      if (this.isRedisAvailable && this.redis) {
+        return await this.runTransaction(async redis => {
+          for (let attempt = 0; attempt < MAX_UPDATE_ATTEMPTS; attempt++) {
+            await redis.watch(key)
+            const cached = await redis.get(key)
+            const updated = updater(cached ? this.deserialize<T>(cached) : null)
+            if (updated === null) {
+              await redis.unwatch()
+              return null
+            }
+
+            const serialized = this.serialize(updated)
+            const transaction = redis.multi()
+            if (ttl) {
+              transaction.setex(key, ttl, serialized)
+            } else {
+              transaction.set(key, serialized, 'KEEPTTL')
+            }
+
+            // exec() resolves to null when the watched key changed underneath us
+            if (await transaction.exec()) return updated
+          }
+          return null
+        })
       }
-      
-      return cached.value as T
+    } catch (error) {
+      this.isRedisAvailable = this.redis?.status === 'ready'
     }
+
+    // In-memory fallback is single-threaded, so a plain get/set is already atomic
+    const updated = updater(this.getFromMemory<T>(key))
+    if (updated !== null) {
+      const existing = this.inMemoryCache.get(key)
+      if (!ttl && existing) {
+        this.inMemoryCache.set(key, { value: updated, expiry: existing.expiry })
+      } else {
+        this.setInMemory(key, updated, ttl)
+      }
+    }
+    return updated
   }
 
   private cleanupMemoryCache() {
@@ -248,11 +466,12 @@ export class SmartHeadCacheService {
     messages?: any[]
   ): Promise<void> {
     const key = this.generateKey(CACHE_PATTERNS.CONVERSATION, userId, conversationId)
+    const recentMessages = (messages || []).slice(-MAX_CACHED_CONVERSATION_MESSAGES)
     const cached: ConversationCache = {
       userId,
       conversationId,
       context,
-      messages: messages || [],
+      messages: recentMessages,
       metadata: {
         lastUpdated: new Date().toISOString(),
         messageCount: messages?.length || 0,
@@ -301,14 +520,17 @@ export class SmartHeadCacheService {
 
   async getCachedGreeting(userId: string, greetingType: string): Promise<GreetingCache | null> {
     const key = this.generateKey(CACHE_PATTERNS.GREETING, userId, greetingType)
-    const cached = await this.safeGet<GreetingCache>(key)
-    
-    // Increment usage count if found
-    if (cached) {
-      cached.metadata.usageCount += 1
-      await this.safeSet(key, cached, this.config.ttl.greetings)
-    }
     
+    const cached = await this.safeGet<GreetingCache>(key)
+    if (!cached) return null
+
+    // Bump the usage count in the background so the lookup doesn't wait on a transaction;
+    // a read shouldn't push out the greeting's expiry either
+    void this.safeUpdate<GreetingCache>(key, current => current && {
+      ...current,
+      metadata: { ...current.metadata, usageCount: current.metadata.usageCount + 1 }
+    })
+
     return cached
   }
 
@@ -332,29 +554,36 @@ export class SmartHeadCacheService {
     return cached?.report || null
   }
 
+  // Invalidation must not be skipped the way a cache read can be: an import that runs before
+  // the deferred connect finishes, or while the client is reconnecting, would otherwise only
+  // clear the in-memory fallback and leave stale reports in Redis for the full TTL
   async invalidateReportCache(changedTable: string): Promise<void> {
+    await this.initialized
+
+    // Reports may have been written to the in-memory fallback during an outage, so always sweep it
+    const prefix = this.generateKey(CACHE_PATTERNS.REPORT, '')
+    for (const [key, cached] of this.inMemoryCache.entries()) {
+      if (key.startsWith(prefix) && cached.value?.metadata?.dependencies?.includes(changedTable)) {
+        this.inMemoryCache.delete(key)
+      }
+    }
+
+    if (!this.redis) return
+
+    // Go through runCommand even if the client is marked unavailable so it reconnects first
     try {
-      if (this.isRedisAvailable && this.redis) {
-        const pattern = this.generateKey(CACHE_PATTERNS.REPORT, '*')
-        const keys = await this.redis.keys(pattern)
-        
-        for (const key of keys) {
-          const cached = await this.safeGet<{report: any, dependencies: string[], metadata: any}>(key)
-          if (cached?.metadata?.dependencies?.includes(changedTable)) {
-            await this.redis.del(key)
-          }
-        }
-      } else {
-        // Fallback: scan in-memory cache
-        const pattern = this.generateKey(CACHE_PATTERNS.REPORT, '')
-        for (const [key] of this.inMemoryCache.entries()) {
-          if (key.startsWith(pattern)) {
-            const cached = this.inMemoryCache.get(key)
-            if (cached?.value?.metadata?.dependencies?.includes(changedTable)) {
-              this.inMemoryCache.delete(key)
-            }
-          }
-        }
+      const pattern = this.generateKey(CACHE_PATTERNS.REPORT, '*')
+      const keys = await this.runCommand(redis => redis.keys(pattern))
+      if (keys.length === 0) return
+
+      // Read every report in one MGET and drop the stale ones with a single UNLINK
+      const reports = await this.runCommand(redis => redis.mget(...keys))
+      const staleKeys = keys.filter((_, index) => {
+        const raw = reports[index]
+        return raw && this.deserialize<{metadata?: any}>(raw)?.metadata?.dependencies?.includes(changedTable)
+      })
+      if (staleKeys.length > 0) {
+        await this.runCommand(redis => redis.unlink(...staleKeys))
       }
     } catch (error) {
       console.error('Failed to invalidate report cache:', error)
@@ -412,6 +641,17 @@ export class SmartHeadCacheService {
     return this.safeGet(key)
   }
 
+  // ===== Classification Caching =====
+  async cacheClassification(queryHash: string, classification: any): Promise<void> {
+    const key = this.generateKey(CACHE_PATTERNS.CLASSIFICATION, queryHash)
+    await this.safeSet(key, classification, this.config.ttl.classifications)
+  }
+
+  async getCachedClassification(queryHash: string): Promise<any> {
+    const key = this.generateKey(CACHE_PATTERNS.CLASSIFICATION, queryHash)
+    return this.safeGet(key)
+  }
+
   // ===== Utility Methods =====
   async clearUserCache(userId: string): Promise<void> {
     try {
@@ -422,11 +662,12 @@ export class SmartHeadCacheService {
           this.generateKey(CACHE_PATTERNS.GREETING, userId, '*')
         ]
         
-        for (const pattern of patterns) {
-          const keys = await this.redis.keys(pattern)
-          if (keys.length > 0) {
-            await this.redis.del(...keys)
-          }
+        const keys = (await Promise.all(
+          patterns.map(pattern => this.runCommand(redis => redis.keys(pattern)))
+        )).flat()
+        if (keys.length > 0) {
+          // UNLINK frees large conversation payloads off the main Redis thread
+          await this.runCommand(redis => redis.unlink(...keys))
         }
       } else {
         // Fallback: clear from in-memory cache
@@ -450,7 +691,7 @@ export class SmartHeadCacheService {
   async getCacheStats(): Promise<any> {
     try {
       if (this.isRedisAvailable && this.redis) {
-        const keyCount = await this.redis.dbsize()
+        const keyCount = await this.runCommand(redis => redis.dbsize())
         
         return {
           connected: true,
@@ -459,6 +700,7 @@ export class SmartHeadCacheService {
           config: {
             host: this.config.host,
             port: this.config.port,
+            socketPath: this.config.socketPath,
             db: this.config.db
           }
         }
@@ -485,6 +727,11 @@ export class SmartHeadCacheService {
   }
 
   async disconnect(): Promise<void> {
+    for (const redis of this.transactionClients) {
+      redis.disconnect()
+    }
+    this.transactionClients = []
+    this.idleTransactionClients = []
     if (this.redis) {
       await this.redis.disconnect()
     }
@@ -504,15 +751,19 @@ export class SmartHeadCacheService {
 
 // Utility function to generate consistent hashes
 export function generateSQLHash(sqlQuery: string, dataSource?: string): string {
-  const crypto = require('crypto')
   const combined = `${sqlQuery}:${dataSource || 'default'}`
-  return crypto.createHash('sha256').update(combined).digest('hex').substring(0, 16)
+  return createHash('sha256').update(combined).digest('hex').substring(0, 16)
 }
 
 export function generateQueryHash(query: string, uploads: any[] = [], context?: any): string {
-  const crypto = require('crypto')
-  const combined = JSON.stringify({ query, uploads: uploads.map(u => u.type), context })
-  return crypto.createHash('sha256').update(combined).digest('hex').substring(0, 16)
+  // Key on the file ids, not just their types, so a question about a different upload
+  // never gets the previous file's analysis back
+  const combined = JSON.stringify({
+    query,
+    uploads: uploads.map(u => ({ fileId: u.fileId, type: u.type })),
+    context
+  })
+  return createHash('sha256').update(combined).digest('hex').substring(0, 16)
 }
 
 export default SmartHeadCacheService
\ No newline at end of file
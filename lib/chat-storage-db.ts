@@ -1,6 +1,69 @@
 import { Database } from './database'
+import { randomUUID } from 'crypto'
+import type { QueryConfig } from 'pg'
 import { ChatMessage, SavedChat, MessageFeedback, EvidenceReference, AnalysisMode } from '@/lib/types'
 
+// Hot read paths use named statements so pg prepares each one once per pooled connection
+const USER_SESSIONS_QUERY: QueryConfig = {
+  name: 'chat_user_sessions',
+  text: `SELECT s.session_id, s.title, s.created_at, s.updated_at, s.message_count, s.user_id
+         FROM user_chat_sessions s 
+         WHERE s.user_id = $1 
+         ORDER BY s.updated_at DESC 
+         LIMIT 50`
+}
+
+const SESSION_QUERY: QueryConfig = {
+  name: 'chat_session',
+  text: 'SELECT session_id, title, created_at, updated_at, message_count, user_id FROM user_chat_sessions WHERE session_id = $1 AND user_id = $2'
+}
+
+const SESSION_MESSAGES_QUERY: QueryConfig = {
+  name: 'chat_session_messages',
+  text: `SELECT m.message_id, m.role, m.content, m.reasoning, m.sql_query, m.metadata, m.created_at, m.mode, m.evidence_reference_id,
+                f.rating as feedback_rating, f.notes as feedback_notes, f.feedback_type,
+                e.evidence_type, e.evidence_data, e.confidence_score, e.artifact_url
+         FROM chat_messages m
+         LEFT JOIN message_feedback f ON m.message_id = f.message_id AND m.user_id = f.user_id
+         LEFT JOIN evidence_references e ON m.evidence_reference_id = e.evidence_id
+         WHERE m.session_id = $1 AND m.user_id = $2 
+         ORDER BY m.created_at ASC`
+}
+
+const SESSION_EVIDENCE_QUERY: QueryConfig = {
+  name: 'chat_session_evidence',
+  text: `SELECT DISTINCT e.evidence_id, e.message_id, e.user_id, e.evidence_type, e.evidence_data, 
+                e.metadata, e.confidence_score, e.data_sources, e.artifact_url, e.created_at, e.updated_at
+         FROM evidence_references e
+         JOIN chat_messages m ON e.message_id = m.message_id
+         WHERE m.session_id = $1 AND m.user_id = $2`
+}
+
+// Same as the per-session queries above, but for every listed session at once
+const SESSIONS_MESSAGES_QUERY: QueryConfig = {
+  name: 'chat_sessions_messages',
+  text: `SELECT m.session_id, m.message_id, m.role, m.content, m.reasoning, m.sql_query, m.metadata, m.created_at, m.mode, m.evidence_reference_id,
+                f.rating as feedback_rating, f.notes as feedback_notes, f.feedback_type,
+                e.evidence_type, e.evidence_data, e.confidence_score, e.artifact_url
+         FROM chat_messages m
+         LEFT JOIN message_feedback f ON m.message_id = f.message_id AND m.user_id = f.user_id
+         LEFT JOIN evidence_references e ON m.evidence_reference_id = e.evidence_id
+         WHERE m.session_id = ANY($1) AND m.user_id = $2 
+         ORDER BY m.created_at ASC`
+}
+
+const SESSIONS_EVIDENCE_QUERY: QueryConfig = {
+  name: 'chat_sessions_evidence',
+  text: `SELECT DISTINCT m.session_id, e.evidence_id, e.message_id, e.user_id, e.evidence_type, e.evidence_data, 
+                e.metadata, e.confidence_score, e.data_sources, e.artifact_url, e.created_at, e.updated_at
+         FROM evidence_references e
+         JOIN chat_messages m ON e.message_id = m.message_id
+         WHERE m.session_id = ANY($1) AND m.user_id = $2`
+}
+
+// Rows per multi-row INSERT in saveChat; keeps a statement well under pg's 65535 parameter limit
+const MESSAGE_INSERT_BATCH_SIZE = 500
+
 export class DatabaseChatStorageService {
   private static instance: DatabaseChatStorageService
   
@@ -27,28 +90,22 @@ export class DatabaseChatStorageService {
       try {
         await client.query('BEGIN')
 
-        // Check if session exists
+        // Create or update the session in one statement; the WHERE keeps another user's
+        // session with the same id untouched, in which case nothing is returned
         const sessionResult = await client.query(
-          'SELECT id, created_at FROM user_chat_sessions WHERE session_id = $1 AND user_id = $2',
-          [chatId, userId]
+          `INSERT INTO user_chat_sessions (user_id, session_id, title, message_count)
+          VALUES ($1, $2, $3, $4)
+          ON CONFLICT (session_id) DO UPDATE
+          SET title = EXCLUDED.title, message_count = EXCLUDED.message_count, updated_at = NOW()
+          WHERE user_chat_sessions.user_id = EXCLUDED.user_id
+          RETURNING created_at`,
+          [userId, chatId, title, messages.length]
         )
 
-        let createdAt: Date
         if (sessionResult.rows.length === 0) {
-          // Create new session
-          await client.query(
-            'INSERT INTO user_chat_sessions (user_id, session_id, title, message_count) VALUES ($1, $2, $3, $4)',
-            [userId, chatId, title, messages.length]
-          )
-          createdAt = new Date()
-        } else {
-          // Update existing session
-          await client.query(
-            'UPDATE user_chat_sessions SET title = $1, message_count = $2, updated_at = NOW() WHERE session_id = $3 AND user_id = $4',
-            [title, messages.length, chatId, userId]
-          )
-          createdAt = sessionResult.rows[0].created_at
+          throw new Error(`Chat session ${chatId} belongs to another user`)
         }
+        const createdAt: Date = sessionResult.rows[0].created_at
 
         // Delete existing messages for this session (for updates)
         await client.query(
@@ -56,15 +113,16 @@ export class DatabaseChatStorageService {
           [chatId, userId]
         )
 
-        // Insert all messages with enhanced fields
-        for (const message of messages) {
-          await client.query(
-            `INSERT INTO chat_messages 
-            (session_id, user_id, message_id, role, content, reasoning, sql_query, metadata, mode, evidence_reference_id) 
-            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)`,
-            [
-              chatId, 
-              userId, 
+        // Insert all messages with enhanced fields, a batch of rows per statement
+        for (let offset = 0; offset < messages.length; offset += MESSAGE_INSERT_BATCH_SIZE) {
+          const batch = messages.slice(offset, offset + MESSAGE_INSERT_BATCH_SIZE)
+          const values: string[] = []
+          const params: any[] = [chatId, userId]
+
+          for (const message of batch) {
+            const base = params.length
+            values.push(`($1, $2, ${Array.from({ length: 8 }, (_, i) => `$${base + i + 1}`).join(', ')})`)
+            params.push(
               message.id, 
               message.role, 
               message.content, 
@@ -73,7 +131,14 @@ export class DatabaseChatStorageService {
               message.metadata ? JSON.stringify(message.metadata) : null,
               message.mode || 'analyst',
               message.evidenceReferenceId || null
-            ]
+            )
+          }
+
+          await client.query(
+            `INSERT INTO chat_messages 
+            (session_id, user_id, message_id, role, content, reasoning, sql_query, metadata, mode, evidence_reference_id) 
+            VALUES ${values.join(', ')}`,
+            params
           )
         }
 
@@ -107,76 +172,37 @@ export class DatabaseChatStorageService {
     
     try {
       const result = await Database.query(
-        `SELECT s.session_id, s.title, s.created_at, s.updated_at, s.message_count, s.user_id
-         FROM user_chat_sessions s 
-         WHERE s.user_id = $1 
-         ORDER BY s.updated_at DESC 
-         LIMIT 50`,
+        USER_SESSIONS_QUERY,
         [userId]
       )
 
-      const chats: SavedChat[] = []
-      
-      for (const session of result.rows) {
-        // Get messages for this session with evidence and feedback data
-        const messagesResult = await Database.query(
-          `SELECT m.message_id, m.role, m.content, m.reasoning, m.sql_query, m.metadata, m.created_at, m.mode, m.evidence_reference_id,
-                  f.rating as feedback_rating, f.notes as feedback_notes, f.feedback_type,
-                  e.evidence_type, e.evidence_data, e.confidence_score, e.artifact_url
-           FROM chat_messages m
-           LEFT JOIN message_feedback f ON m.message_id = f.message_id AND m.user_id = f.user_id
-           LEFT JOIN evidence_references e ON m.evidence_reference_id = e.evidence_id
-           WHERE m.session_id = $1 AND m.user_id = $2 
-           ORDER BY m.created_at ASC`,
-          [session.session_id, userId]
-        )
+      const sessionIds = result.rows.map(session => session.session_id)
+      if (sessionIds.length === 0) return []
 
-        const messages: ChatMessage[] = messagesResult.rows.map(row => ({
-          id: row.message_id,
-          role: row.role,
-          content: row.content,
-          timestamp: row.created_at,
-          reasoning: row.reasoning,
-          sqlQuery: row.sql_query,
-          metadata: row.metadata ? JSON.parse(row.metadata) : undefined,
-          mode: row.mode as AnalysisMode,
-          evidenceReferenceId: row.evidence_reference_id,
-          feedback: row.feedback_rating,
-          followUpQueries: row.metadata?.followUpQueries || []
-        }))
-
-        // Calculate feedback summary
-        const feedbackSummary = {
-          positiveCount: messages.filter(m => m.feedback === 'positive').length,
-          negativeCount: messages.filter(m => m.feedback === 'negative').length,
-          totalCount: messages.filter(m => m.feedback).length
-        }
+      // Load messages and evidence for all sessions in two queries instead of two per session
+      const [messagesResult, evidenceResult] = await Promise.all([
+        Database.query(SESSIONS_MESSAGES_QUERY, [sessionIds, userId]),
+        Database.query(SESSIONS_EVIDENCE_QUERY, [sessionIds, userId])
+      ])
 
-        // Get evidence references for this conversation
-        const evidenceResult = await Database.query(
-          `SELECT DISTINCT e.evidence_id, e.message_id, e.user_id, e.evidence_type, e.evidence_data, 
-                  e.metadata, e.confidence_score, e.data_sources, e.artifact_url, e.created_at, e.updated_at
-           FROM evidence_references e
-           JOIN chat_messages m ON e.message_id = m.message_id
-           WHERE m.session_id = $1 AND m.user_id = $2`,
-          [session.session_id, userId]
-        )
+      const messagesBySession = new Map<string, ChatMessage[]>()
+      for (const row of messagesResult.rows) {
+        const sessionMessages = messagesBySession.get(row.session_id) || []
+        sessionMessages.push(this.mapMessageRow(row))
+        messagesBySession.set(row.session_id, sessionMessages)
+      }
+
+      const evidenceBySession = new Map<string, EvidenceReference[]>()
+      for (const row of evidenceResult.rows) {
+        const sessionEvidence = evidenceBySession.get(row.session_id) || []
+        sessionEvidence.push(this.mapEvidenceRow(row))
+        evidenceBySession.set(row.session_id, sessionEvidence)
+      }
 
-        const evidenceReferences: EvidenceReference[] = evidenceResult.rows.map(row => ({
-          evidenceId: row.evidence_id,
-          messageId: row.message_id,
-          userId: row.user_id,
-          evidenceType: row.evidence_type,
-          evidenceData: row.evidence_data,
-          metadata: row.metadata,
-          confidenceScore: row.confidence_score,
-          dataSources: row.data_sources,
-          artifactUrl: row.artifact_url,
-          createdAt: row.created_at,
-          updatedAt: row.updated_at
-        }))
-
-        chats.push({
+      const chats: SavedChat[] = result.rows.map(session => {
+        const messages = messagesBySession.get(session.session_id) || []
+
+        return {
           id: session.session_id,
           title: session.title,
           messages,
@@ -185,10 +211,10 @@ export class DatabaseChatStorageService {
           messageCount: session.message_count,
           userId: session.user_id,
           defaultMode: messages.length > 0 ? messages[0].mode : 'analyst',
-          evidenceReferences,
-          feedbackSummary
-        })
-      }
+          evidenceReferences: evidenceBySession.get(session.session_id) || [],
+          feedbackSummary: this.summarizeFeedback(messages)
+        }
+      })
 
       return chats
     } catch (error) {
@@ -202,7 +228,7 @@ export class DatabaseChatStorageService {
     
     try {
       const sessionResult = await Database.query(
-        'SELECT session_id, title, created_at, updated_at, message_count, user_id FROM user_chat_sessions WHERE session_id = $1 AND user_id = $2',
+        SESSION_QUERY,
         [chatId, userId]
       )
 
@@ -212,61 +238,19 @@ export class DatabaseChatStorageService {
 
       // Get messages for this session with evidence and feedback data
       const messagesResult = await Database.query(
-        `SELECT m.message_id, m.role, m.content, m.reasoning, m.sql_query, m.metadata, m.created_at, m.mode, m.evidence_reference_id,
-                f.rating as feedback_rating, f.notes as feedback_notes, f.feedback_type,
-                e.evidence_type, e.evidence_data, e.confidence_score, e.artifact_url
-         FROM chat_messages m
-         LEFT JOIN message_feedback f ON m.message_id = f.message_id AND m.user_id = f.user_id
-         LEFT JOIN evidence_references e ON m.evidence_reference_id = e.evidence_id
-         WHERE m.session_id = $1 AND m.user_id = $2 
-         ORDER BY m.created_at ASC`,
+        SESSION_MESSAGES_QUERY,
         [chatId, userId]
       )
 
-      const messages: ChatMessage[] = messagesResult.rows.map(row => ({
-        id: row.message_id,
-        role: row.role,
-        content: row.content,
-        timestamp: row.created_at,
-        reasoning: row.reasoning,
-        sqlQuery: row.sql_query,
-        metadata: row.metadata ? JSON.parse(row.metadata) : undefined,
-        mode: row.mode as AnalysisMode,
-        evidenceReferenceId: row.evidence_reference_id,
-        feedback: row.feedback_rating,
-        followUpQueries: row.metadata?.followUpQueries || []
-      }))
-
-      // Calculate feedback summary
-      const feedbackSummary = {
-        positiveCount: messages.filter(m => m.feedback === 'positive').length,
-        negativeCount: messages.filter(m => m.feedback === 'negative').length,
-        totalCount: messages.filter(m => m.feedback).length
-      }
+      const messages: ChatMessage[] = messagesResult.rows.map(row => this.mapMessageRow(row))
 
       // Get evidence references for this conversation
       const evidenceResult = await Database.query(
-        `SELECT DISTINCT e.evidence_id, e.message_id, e.user_id, e.evidence_type, e.evidence_data, 
-                e.metadata, e.confidence_score, e.data_sources, e.artifact_url, e.created_at, e.updated_at
-         FROM evidence_references e
-         JOIN chat_messages m ON e.message_id = m.message_id
-         WHERE m.session_id = $1 AND m.user_id = $2`,
+        SESSION_EVIDENCE_QUERY,
         [chatId, userId]
       )
 
-      const evidenceReferences: EvidenceReference[] = evidenceResult.rows.map(row => ({
-        evidenceId: row.evidence_id,
-        messageId: row.message_id,
-        userId: row.user_id,
-        evidenceType: row.evidence_type,
-        evidenceData: row.evidence_data,
-        metadata: row.metadata,
-        confidenceScore: row.confidence_score,
-        dataSources: row.data_sources,
-        artifactUrl: row.artifact_url,
-        createdAt: row.created_at,
-        updatedAt: row.updated_at
-      }))
+      const evidenceReferences: EvidenceReference[] = evidenceResult.rows.map(row => this.mapEvidenceRow(row))
 
       return {
         id: session.session_id,
@@ -278,7 +262,7 @@ export class DatabaseChatStorageService {
         userId: session.user_id,
         defaultMode: messages.length > 0 ? messages[0].mode : 'analyst',
         evidenceReferences,
-        feedbackSummary
+        feedbackSummary: this.summarizeFeedback(messages)
       }
     } catch (error) {
       console.error('Failed to get chat:', error)
@@ -304,7 +288,48 @@ export class DatabaseChatStorageService {
   }
 
   generateChatId(): string {
-    return `chat_${Date.now()}_${Math.random().toString(36).substr(2, 9)}`
+    return `chat_${Date.now()}_${randomUUID()}`
+  }
+
+  // Map a chat_messages row (joined with feedback and evidence) to a ChatMessage
+  private mapMessageRow(row: any): ChatMessage {
+    return {
+      id: row.message_id,
+      role: row.role,
+      content: row.content,
+      timestamp: row.created_at,
+      reasoning: row.reasoning,
+      sqlQuery: row.sql_query,
+      metadata: row.metadata || undefined,
+      mode: row.mode as AnalysisMode,
+      evidenceReferenceId: row.evidence_reference_id,
+      feedback: row.feedback_rating,
+      followUpQueries: row.metadata?.followUpQueries || []
+    }
+  }
+
+  private mapEvidenceRow(row: any): EvidenceReference {
+    return {
+      evidenceId: row.evidence_id,
+      messageId: row.message_id,
+      userId: row.user_id,
+      evidenceType: row.evidence_type,
+      evidenceData: row.evidence_data,
+      metadata: row.metadata,
+      confidenceScore: row.confidence_score,
+      dataSources: row.data_sources,
+      artifactUrl: row.artifact_url,
+      createdAt: row.created_at,
+      updatedAt: row.updated_at
+    }
+  }
+
+  private summarizeFeedback(messages: ChatMessage[]): NonNullable<SavedChat['feedbackSummary']> {
+    return {
+      positiveCount: messages.filter(m => m.feedback === 'positive').length,
+      negativeCount: messages.filter(m => m.feedback === 'negative').length,
+      totalCount: messages.filter(m => m.feedback).length
+    }
   }
 
   // Initialize with pre-generated example chats for demonstration
@@ -312,8 +337,12 @@ export class DatabaseChatStorageService {
     if (!userId) return
     
     try {
-      const existingChats = await this.getAllChats(userId)
-      if (existingChats.length > 0) return // Don't overwrite existing chats
+      // Existence check only - no need to load every chat with its messages and evidence
+      const existingChats = await Database.query(
+        'SELECT 1 FROM user_chat_sessions WHERE user_id = $1 LIMIT 1',
+        [userId]
+      )
+      if (existingChats.rows.length > 0) return // Don't overwrite existing chats
 
       // Create example chats (same content as before but stored in database)
       const exampleChats = [
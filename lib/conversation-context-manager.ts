@@ -2,6 +2,7 @@
 import { DatabaseChatStorageService } from './chat-storage-db'
 import { DatabaseMessageStorage } from './message-storage-db'
 import Database from './database'
+import type { SavedChat } from '@/lib/types'
 
 export interface ConversationContext {
   userId: string
@@ -116,14 +117,14 @@ export class ConversationContextManager {
   }
 
   private async buildConversationContext(userId: string, conversationId: string): Promise<ConversationContext> {
-    // Get basic conversation data
-    const chatData = await this.chatStorage.getChat(conversationId, userId)
+    // Get basic conversation data and historical patterns for this user
+    const [chatData, userPatterns] = await Promise.all([
+      this.chatStorage.getChat(conversationId, userId),
+      this.getUserPatterns(userId)
+    ])
     
-    // Get historical patterns for this user
-    const userPatterns = await this.getUserPatterns(userId)
-    
-    // Get conversation-specific context
-    const conversationPatterns = await this.getConversationPatterns(conversationId, userId)
+    // Get conversation-specific context from the chat already loaded above
+    const conversationPatterns = this.getConversationPatterns(chatData)
     
     return {
       userId,
@@ -201,23 +202,21 @@ export class ConversationContextManager {
     }
   }
 
-  private async getConversationPatterns(conversationId: string, userId: string): Promise<{
+  private getConversationPatterns(chatData: SavedChat | null): {
     topics: string[]
     summary: string
-  }> {
+  } {
     try {
       // Analyze conversation messages to extract topics and patterns
-      const messages = await this.chatStorage.getChat(conversationId, userId)
-      
-      if (!messages || !messages.messages) {
+      if (!chatData || !chatData.messages) {
         return { topics: [], summary: '' }
       }
 
       // Extract topics from conversation
-      const topics = this.extractTopicsFromMessages(messages.messages)
+      const topics = this.extractTopicsFromMessages(chatData.messages)
       
       // Generate conversation summary
-      const summary = this.generateConversationSummary(messages.messages)
+      const summary = this.generateConversationSummary(chatData.messages)
       
       return { topics, summary }
     } catch (error) {
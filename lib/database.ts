@@ -1,4 +1,5 @@
-import { Pool } from 'pg';
+import { Pool, PoolClient, QueryConfig } from 'pg';
+import { SmartHeadCacheService } from './cache/redis-service';
 
 const pool = new Pool({
   connectionString: process.env.DATABASE_URL,
@@ -14,6 +15,20 @@ pool.on('error', (err) => {
   process.exit(-1);
 });
 
+// Columns returned by search queries. The 1536-dim embedding columns are left out
+// so each hit doesn't ship several kilobytes of vector data back to the app.
+const SEARCH_COLUMNS: Record<string, string> = {
+  financial_data: `id, fiscal_year_number, fiscal_year_month, fiscal_year_week, fiscal_day,
+    finalization_date, hfm_entity, hfm_cost_group, fim_account, account_code, account,
+    cost_center_code, cost_center, amount, search_text, created_at, updated_at`,
+  baanspending: `id, invoice_created_date, year, month, quarter, quarter_year, commodity,
+    description, supplier, reporting_total, po_ship_to_city, chart_of_accounts,
+    accounting_currency, invoice_number, search_text, created_at, updated_at`
+};
+
+// Rows per multi-row INSERT during CSV imports (14 columns -> 14k bind parameters, under pg's 65535 cap)
+const IMPORT_BATCH_SIZE = 1000;
+
 export class Database {
   static async getClient() {
     try {
@@ -24,10 +39,14 @@ export class Database {
     }
   }
 
-  static async query(text: string, params?: any[]) {
+  // Accepts a QueryConfig so hot paths can pass a statement `name` and have
+  // pg prepare it once per connection instead of re-parsing on every call
+  static async query(text: string | QueryConfig, params?: any[]) {
     const client = await this.getClient();
     try {
-      const result = await client.query(text, params);
+      const result = typeof text === 'string'
+        ? await client.query(text, params)
+        : await client.query({ ...text, values: params ?? text.values });
       return result;
     } finally {
       client.release();
@@ -38,8 +57,9 @@ export class Database {
     const client = await this.getClient();
     
     try {
-      // Enable pgvector extension
+      // Enable pgvector extension, and pg_trgm for the substring (ILIKE '%...%') filters
       await client.query('CREATE EXTENSION IF NOT EXISTS vector');
+      await client.query('CREATE EXTENSION IF NOT EXISTS pg_trgm');
       
       // Create the baanspending table based on CSV structure
       await client.query(`
@@ -108,6 +128,19 @@ export class Database {
         ON baanspending(po_ship_to_city);
       `);
 
+      // Trigram indexes so supplier/commodity ILIKE '%...%' filters don't scan the table. The
+      // btree indexes above stay: they serve the equality filters and the ordered scans behind
+      // GROUP BY supplier/commodity in the agent and catalog queries, which GIN can't provide
+      await client.query(`
+        CREATE INDEX IF NOT EXISTS idx_baanspending_supplier_trgm 
+        ON baanspending USING gin(supplier gin_trgm_ops);
+      `);
+      
+      await client.query(`
+        CREATE INDEX IF NOT EXISTS idx_baanspending_commodity_trgm 
+        ON baanspending USING gin(commodity gin_trgm_ops);
+      `);
+
       // Create vector similarity search indexes
       await client.query(`
         CREATE INDEX IF NOT EXISTS idx_baanspending_supplier_embedding 
@@ -147,8 +180,9 @@ export class Database {
     const client = await this.getClient();
     
     try {
-      // Enable pgvector extension
+      // Enable pgvector extension, and pg_trgm for the substring (ILIKE '%...%') filters
       await client.query('CREATE EXTENSION IF NOT EXISTS vector');
+      await client.query('CREATE EXTENSION IF NOT EXISTS pg_trgm');
       
       // Create the financial_data table based on CSV structure
       await client.query(`
@@ -204,6 +238,19 @@ export class Database {
         ON financial_data(amount);
       `);
 
+      // Trigram indexes so entity/cost group ILIKE '%...%' filters don't scan the table. The
+      // btree indexes above stay for equality filters (e.g. hfm_cost_group = '...') and the
+      // ordered scans behind GROUP BY hfm_entity/hfm_cost_group, which GIN can't provide
+      await client.query(`
+        CREATE INDEX IF NOT EXISTS idx_financial_data_entity_trgm 
+        ON financial_data USING gin(hfm_entity gin_trgm_ops);
+      `);
+      
+      await client.query(`
+        CREATE INDEX IF NOT EXISTS idx_financial_data_cost_group_trgm 
+        ON financial_data USING gin(hfm_cost_group gin_trgm_ops);
+      `);
+
       // Create vector similarity search indexes
       await client.query(`
         CREATE INDEX IF NOT EXISTS idx_financial_data_entity_embedding 
@@ -267,21 +314,11 @@ export class Database {
       `);
 
       // Create indexes for chat tables
-      await client.query(`
-        CREATE INDEX IF NOT EXISTS idx_user_chat_sessions_user_id 
-        ON user_chat_sessions(user_id);
-      `);
-      
       await client.query(`
         CREATE INDEX IF NOT EXISTS idx_user_chat_sessions_updated_at 
         ON user_chat_sessions(updated_at DESC);
       `);
       
-      await client.query(`
-        CREATE INDEX IF NOT EXISTS idx_chat_messages_session_id 
-        ON chat_messages(session_id);
-      `);
-      
       await client.query(`
         CREATE INDEX IF NOT EXISTS idx_chat_messages_user_id 
         ON chat_messages(user_id);
@@ -291,10 +328,34 @@ export class Database {
         CREATE INDEX IF NOT EXISTS idx_stored_message_data_message_id 
         ON stored_message_data(message_id);
       `);
+
+      // Composite indexes matching the hot filter + sort of the chat list, message load and cleanup queries
+      await client.query(`
+        CREATE INDEX IF NOT EXISTS idx_user_chat_sessions_user_updated 
+        ON user_chat_sessions(user_id, updated_at DESC);
+      `);
+      
+      await client.query(`
+        CREATE INDEX IF NOT EXISTS idx_chat_messages_session_created 
+        ON chat_messages(session_id, created_at);
+      `);
       
       await client.query(`
-        CREATE INDEX IF NOT EXISTS idx_stored_message_data_user_id 
-        ON stored_message_data(user_id);
+        CREATE INDEX IF NOT EXISTS idx_stored_message_data_user_updated 
+        ON stored_message_data(user_id, updated_at DESC);
+      `);
+
+      // The composites above lead with the same column, so they serve these lookups on their own
+      await client.query(`
+        DROP INDEX IF EXISTS idx_user_chat_sessions_user_id;
+      `);
+      
+      await client.query(`
+        DROP INDEX IF EXISTS idx_chat_messages_session_id;
+      `);
+      
+      await client.query(`
+        DROP INDEX IF EXISTS idx_stored_message_data_user_id;
       `);
 
       // Add new columns to existing chat_messages table if they don't exist
@@ -467,6 +528,13 @@ export class Database {
         ON file_uploads(created_at DESC);
       `);
 
+      // Partial index for the "completed uploads for a user" context lookup
+      await client.query(`
+        CREATE INDEX IF NOT EXISTS idx_file_uploads_user_completed 
+        ON file_uploads(user_id, created_at DESC)
+        WHERE processing_status = 'completed';
+      `);
+
       // Create indexes for conversation context tables
       await client.query(`
         CREATE INDEX IF NOT EXISTS idx_user_conversation_profiles_user_id 
@@ -574,11 +642,6 @@ export class Database {
       `);
 
       // Create indexes for bulk insight jobs
-      await client.query(`
-        CREATE INDEX IF NOT EXISTS idx_bulk_insight_jobs_user_id 
-        ON bulk_insight_jobs(user_id);
-      `);
-      
       await client.query(`
         CREATE INDEX IF NOT EXISTS idx_bulk_insight_jobs_status 
         ON bulk_insight_jobs(status);
@@ -589,6 +652,17 @@ export class Database {
         ON bulk_insight_jobs(created_at DESC);
       `);
 
+      // Backs the per-user job history listing (user_id filter, newest first)
+      await client.query(`
+        CREATE INDEX IF NOT EXISTS idx_bulk_insight_jobs_user_created 
+        ON bulk_insight_jobs(user_id, created_at DESC);
+      `);
+
+      // Superseded by idx_bulk_insight_jobs_user_created, which leads with user_id
+      await client.query(`
+        DROP INDEX IF EXISTS idx_bulk_insight_jobs_user_id;
+      `);
+
       // Setup Baan database tables
       await this.setupBaanDatabase();
 
@@ -611,16 +685,7 @@ export class Database {
       // Clear existing data
       await client.query('TRUNCATE TABLE financial_data RESTART IDENTITY');
       
-      const insertQuery = `
-        INSERT INTO financial_data (
-          fiscal_year_number, fiscal_year_month, fiscal_year_week, 
-          fiscal_day, finalization_date, hfm_entity, hfm_cost_group,
-          fim_account, account_code, account, cost_center_code, 
-          cost_center, amount, search_text
-        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14)
-      `;
-
-      let importedCount = 0;
+      const rows: any[][] = [];
       
       for (const row of csvData) {
         try {
@@ -640,7 +705,7 @@ export class Database {
             row['Cost Center']
           ].filter(Boolean).join(' ');
 
-          await client.query(insertQuery, [
+          rows.push([
             parseInt(row['Fiscal Year Number']) || null,
             row['Fiscal Year Month'],
             row['Fiscal Year Week'],
@@ -656,19 +721,21 @@ export class Database {
             amount,
             searchText
           ]);
-          
-          importedCount++;
-          
-          if (importedCount % 1000 === 0) {
-            console.log(`Imported ${importedCount} records...`);
-          }
         } catch (rowError) {
-          console.error(`Error importing row ${importedCount + 1}:`, rowError);
+          console.error(`Error importing row ${rows.length + 1}:`, rowError);
           // Continue with next row
         }
       }
+
+      const importedCount = await this.insertInBatches(client, 'financial_data', [
+        'fiscal_year_number', 'fiscal_year_month', 'fiscal_year_week',
+        'fiscal_day', 'finalization_date', 'hfm_entity', 'hfm_cost_group',
+        'fim_account', 'account_code', 'account', 'cost_center_code',
+        'cost_center', 'amount', 'search_text'
+      ], rows, 'records');
       
       await client.query('COMMIT');
+      await SmartHeadCacheService.getInstance().invalidateReportCache('financial_data');
       console.log(`Successfully imported ${importedCount} records`);
       return importedCount;
       
@@ -690,15 +757,7 @@ export class Database {
       // Clear existing data
       await client.query('TRUNCATE TABLE baanspending RESTART IDENTITY');
       
-      const insertQuery = `
-        INSERT INTO baanspending (
-          invoice_created_date, year, month, quarter, quarter_year,
-          commodity, description, supplier, reporting_total, po_ship_to_city,
-          chart_of_accounts, accounting_currency, invoice_number, search_text
-        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14)
-      `;
-
-      let importedCount = 0;
+      const rows: any[][] = [];
       
       for (const row of csvData) {
         try {
@@ -717,7 +776,7 @@ export class Database {
             row['PO Ship-To City']
           ].filter(Boolean).join(' ');
 
-          await client.query(insertQuery, [
+          rows.push([
             invoiceDate,
             parseInt(row['Year']) || null,
             parseInt(row['Month']) || null,
@@ -733,19 +792,20 @@ export class Database {
             row['Invoice #'],
             searchText
           ]);
-          
-          importedCount++;
-          
-          if (importedCount % 1000 === 0) {
-            console.log(`Imported ${importedCount} Baan records...`);
-          }
         } catch (rowError) {
-          console.error(`Error importing Baan row ${importedCount + 1}:`, rowError);
+          console.error(`Error importing Baan row ${rows.length + 1}:`, rowError);
           // Continue with next row
         }
       }
+
+      const importedCount = await this.insertInBatches(client, 'baanspending', [
+        'invoice_created_date', 'year', 'month', 'quarter', 'quarter_year',
+        'commodity', 'description', 'supplier', 'reporting_total', 'po_ship_to_city',
+        'chart_of_accounts', 'accounting_currency', 'invoice_number', 'search_text'
+      ], rows, 'Baan records');
       
       await client.query('COMMIT');
+      await SmartHeadCacheService.getInstance().invalidateReportCache('baanspending');
       console.log(`Successfully imported ${importedCount} Baan records`);
       return importedCount;
       
@@ -758,13 +818,40 @@ export class Database {
     }
   }
 
+  // Insert pre-mapped rows with one multi-row INSERT per batch instead of one statement per row
+  private static async insertInBatches(client: PoolClient, table: string, columns: string[], rows: any[][], label: string) {
+    let importedCount = 0;
+
+    for (let offset = 0; offset < rows.length; offset += IMPORT_BATCH_SIZE) {
+      const batch = rows.slice(offset, offset + IMPORT_BATCH_SIZE);
+      const params: any[] = [];
+      const values = batch.map(row => {
+        const placeholders = row.map(value => {
+          params.push(value);
+          return `$${params.length}`;
+        });
+        return `(${placeholders.join(', ')})`;
+      });
+
+      await client.query(
+        `INSERT INTO ${table} (${columns.join(', ')}) VALUES ${values.join(', ')}`,
+        params
+      );
+
+      importedCount += batch.length;
+      console.log(`Imported ${importedCount} ${label}...`);
+    }
+
+    return importedCount;
+  }
+
   static async semanticSearch(query: string, embedding: number[], limit: number = 10, tableName: string = 'financial_data') {
     const client = await this.getClient();
     
     try {
       const searchQuery = `
         SELECT 
-          *,
+          ${SEARCH_COLUMNS[tableName] ?? '*'},
           1 - (combined_text_embedding <=> $1::vector) AS similarity_score
         FROM ${tableName} 
         WHERE combined_text_embedding IS NOT NULL
@@ -787,7 +874,7 @@ export class Database {
     
     try {
       const searchQuery = `
-        SELECT *,
+        SELECT ${SEARCH_COLUMNS[tableName] ?? '*'},
                ts_rank(to_tsvector('english', search_text), plainto_tsquery('english', $1)) as rank
         FROM ${tableName} 
         WHERE to_tsvector('english', search_text) @@ plainto_tsquery('english', $1)
@@ -806,6 +893,13 @@ export class Database {
   }
 
   static async getFinancialSummary(filters: any = {}, tableName: string = 'financial_data') {
+    // The aggregates only change when a CSV import replaces the table, which
+    // invalidates these entries, so serve repeats from the report cache
+    const cache = SmartHeadCacheService.getInstance();
+    const reportKey = `financial_summary:${tableName}:${JSON.stringify(filters)}`;
+    const cached = await cache.getCachedReport(reportKey);
+    if (cached) return cached;
+
     const client = await this.getClient();
     
     try {
@@ -849,6 +943,7 @@ export class Database {
       `;
       
       const result = await client.query(summaryQuery, params);
+      await cache.cacheReport(reportKey, result.rows, [tableName]);
       return result.rows;
     } catch (error) {
       console.error('Financial summary failed:', error);
@@ -859,6 +954,11 @@ export class Database {
   }
 
   static async getBaanSummary(filters: any = {}) {
+    const cache = SmartHeadCacheService.getInstance();
+    const reportKey = `baan_summary:${JSON.stringify(filters)}`;
+    const cached = await cache.getCachedReport(reportKey);
+    if (cached) return cached;
+
     const client = await this.getClient();
     
     try {
@@ -908,6 +1008,7 @@ export class Database {
       `;
       
       const result = await client.query(summaryQuery, params);
+      await cache.cacheReport(reportKey, result.rows, ['baanspending']);
       return result.rows;
     } catch (error) {
       console.error('Baan summary failed:', error);
@@ -1,5 +1,6 @@
 // Enhanced Gemini 2.5 Flash Client with Thinking Capabilities
 import { GoogleGenerativeAI } from '@google/generative-ai'
+import { createHash } from 'crypto'
 import { SmartHeadCacheService } from '../cache/redis-service'
 
 export interface GeminiConfig {
@@ -42,31 +43,9 @@ export interface ThinkingRequest {
   topP?: number
 }
 
-export class EnhancedGeminiClient {
-  private genAI: GoogleGenerativeAI
-  private config: GeminiConfig
-  private cache: SmartHeadCacheService
-
-  constructor(apiKey?: string) {
-    this.genAI = new GoogleGenerativeAI(apiKey || process.env.GOOGLE_API_KEY || '')
-    this.cache = SmartHeadCacheService.getInstance()
-    
-    // Default configuration for Smart Head platform with new lite model
-    this.config = {
-      model: 'gemini-2.5-flash-lite-preview-09-2025',
-      thinkingEnabled: true,
-      thinkingBudget: 4000, // Optimized for faster responses
-      temperature: 0.7,     // Balanced for speed and quality
-      topP: 0.9,
-      maxTokens: 32000,     // Optimized context window for faster processing
-      multimodalSupport: true
-    }
-  }
-
-  // Enhanced prompts for procurement analytics with thinking
-  private getPromptTemplates() {
-    return {
-      procurement_analyst: `You are an expert procurement analyst with advanced thinking capabilities enabled.
+// Enhanced prompts for procurement analytics with thinking; static, so built once per process
+const PROMPT_TEMPLATES = {
+  procurement_analyst: `You are an expert procurement analyst with advanced thinking capabilities enabled.
 
 THINKING PROCESS:
 1. First, analyze the query thoroughly in your thinking section
@@ -96,7 +75,7 @@ Then provide a polished executive response with:
 - Actionable recommendations
 - Follow-up suggestions`,
 
-      financial_expert: `You are a financial analysis expert with deep thinking capabilities for procurement data.
+  financial_expert: `You are a financial analysis expert with deep thinking capabilities for procurement data.
 
 THINKING APPROACH:
 - Break down complex financial queries systematically
@@ -115,7 +94,7 @@ ANALYSIS FRAMEWORK:
 Always show your analytical reasoning in thinking, then deliver
 concise executive insights with supporting data and clear next steps.`,
 
-      multimodal_processor: `You are a multimodal content processor with thinking capabilities.
+  multimodal_processor: `You are a multimodal content processor with thinking capabilities.
 
 For uploaded files, think through:
 1. Content type identification and analysis approach
@@ -126,6 +105,40 @@ For uploaded files, think through:
 
 Process images, charts, CSV files, and documents with deep analysis
 and provide actionable insights for procurement decision-making.`
+} as const
+
+const THINKING_INSTRUCTIONS = `
+<thinking>
+Use this section to think through your approach step by step:
+1. Understand what the user is asking
+2. Identify the best data sources and analysis approach
+3. Plan your SQL or analysis strategy
+4. Consider business implications and insights
+5. Think about visualization and follow-up opportunities
+
+Be thorough in your reasoning - this helps provide better responses.
+</thinking>
+
+After your thinking, provide your response:`
+
+export class EnhancedGeminiClient {
+  private genAI: GoogleGenerativeAI
+  private config: GeminiConfig
+  private cache: SmartHeadCacheService
+
+  constructor(apiKey?: string) {
+    this.genAI = new GoogleGenerativeAI(apiKey || process.env.GOOGLE_API_KEY || '')
+    this.cache = SmartHeadCacheService.getInstance()
+    
+    // Default configuration for Smart Head platform with new lite model
+    this.config = {
+      model: 'gemini-2.5-flash-lite-preview-09-2025',
+      thinkingEnabled: true,
+      thinkingBudget: 4000, // Optimized for faster responses
+      temperature: 0.7,     // Balanced for speed and quality
+      topP: 0.9,
+      maxTokens: 32000,     // Optimized context window for faster processing
+      multimodalSupport: true
     }
   }
 
@@ -225,29 +238,10 @@ and provide actionable insights for procurement decision-making.`
   }
 
   private buildThinkingPrompt(request: ThinkingRequest): string {
-    const templates = this.getPromptTemplates()
-    
-    let systemContext = ''
-    if (request.systemPrompt) {
-      systemContext = request.systemPrompt
-    } else {
-      // Default to procurement analyst
-      systemContext = templates.procurement_analyst
-    }
-
-    const thinkingInstructions = request.enableThinking !== false ? `
-<thinking>
-Use this section to think through your approach step by step:
-1. Understand what the user is asking
-2. Identify the best data sources and analysis approach
-3. Plan your SQL or analysis strategy
-4. Consider business implications and insights
-5. Think about visualization and follow-up opportunities
-
-Be thorough in your reasoning - this helps provide better responses.
-</thinking>
-
-After your thinking, provide your response:` : ''
+    // A caller-supplied system prompt already travels as the model's systemInstruction,
+    // so only inline the default one rather than sending the same text twice
+    const systemContext = request.systemPrompt ? '' : PROMPT_TEMPLATES.procurement_analyst
+    const thinkingInstructions = request.enableThinking !== false ? THINKING_INSTRUCTIONS : ''
 
     return `${systemContext}
 
@@ -330,7 +324,6 @@ ${request.context ? `\nAdditional Context: ${JSON.stringify(request.context)}` :
   }
 
   private generateCacheKey(request: ThinkingRequest): string {
-    const crypto = require('crypto')
     const keyData = {
       prompt: request.prompt,
       systemPrompt: request.systemPrompt,
@@ -338,16 +331,14 @@ ${request.context ? `\nAdditional Context: ${JSON.stringify(request.context)}` :
       enableThinking: request.enableThinking,
       temperature: request.temperature
     }
-    return crypto.createHash('sha256').update(JSON.stringify(keyData)).digest('hex').substring(0, 16)
+    return createHash('sha256').update(JSON.stringify(keyData)).digest('hex').substring(0, 16)
   }
 
   // Specialized methods for Smart Head use cases
   async analyzeProcurementQuery(query: string, dataSource?: string, context?: any): Promise<GeminiThinkingResponse> {
-    const templates = this.getPromptTemplates()
-    
     return this.generateWithThinking({
       prompt: query,
-      systemPrompt: templates.procurement_analyst,
+      systemPrompt: PROMPT_TEMPLATES.procurement_analyst,
       enableThinking: true,
       context: {
         dataSource: dataSource || 'combined',
@@ -358,11 +349,9 @@ ${request.context ? `\nAdditional Context: ${JSON.stringify(request.context)}` :
   }
 
   async analyzeFinancialData(query: string, financialContext?: any): Promise<GeminiThinkingResponse> {
-    const templates = this.getPromptTemplates()
-    
     return this.generateWithThinking({
       prompt: query,
-      systemPrompt: templates.financial_expert,
+      systemPrompt: PROMPT_TEMPLATES.financial_expert,
       enableThinking: true,
       context: {
         analysisType: 'financial',
@@ -373,13 +362,11 @@ ${request.context ? `\nAdditional Context: ${JSON.stringify(request.context)}` :
   }
 
   async processUploadedFile(fileInfo: any, query?: string): Promise<GeminiThinkingResponse> {
-    const templates = this.getPromptTemplates()
-    
     const prompt = query || `Analyze this uploaded file and provide insights for procurement analysis.`
     
     return this.generateWithThinking({
       prompt,
-      systemPrompt: templates.multimodal_processor,
+      systemPrompt: PROMPT_TEMPLATES.multimodal_processor,
       enableThinking: true,
       context: {
         fileType: fileInfo.type,
@@ -3,16 +3,32 @@ import { DynamicStructuredTool } from '@langchain/core/tools'
 import { z } from 'zod'
 import Database from '@/lib/database'
 
+// Tool input schemas are built once at module load rather than per tool instance
+const DATABASE_QUERY_SCHEMA = z.object({
+  sqlQuery: z.string().describe("The SQL query to execute"),
+  dataSource: z.enum(['coupa', 'baan', 'combined']).describe("Data source to query against"),
+  maxRows: z.number().optional().default(1000).describe("Maximum number of rows to return")
+})
+
+const SEMANTIC_SEARCH_SCHEMA = z.object({
+  searchTerm: z.string().describe("Term to search for in semantic catalog"),
+  dataSource: z.enum(['coupa', 'baan', 'combined']).describe("Data source context"),
+  maxResults: z.number().optional().default(5).describe("Maximum number of results")
+})
+
+const INSIGHT_GENERATION_SCHEMA = z.object({
+  queryResults: z.array(z.any()).describe("Results from database query"),
+  queryContext: z.string().describe("Original query and context"),
+  dataSource: z.string().describe("Data source used"),
+  analysisType: z.enum(['variance', 'trend', 'risk', 'optimization', 'comparative']).describe("Type of analysis")
+})
+
 export class DatabaseQueryTool extends DynamicStructuredTool {
   constructor() {
     super({
       name: "database_query",
       description: "Execute SQL queries against the procurement database. Supports both Coupa (financial_data) and Baan (baanspending) data sources.",
-      schema: z.object({
-        sqlQuery: z.string().describe("The SQL query to execute"),
-        dataSource: z.enum(['coupa', 'baan', 'combined']).describe("Data source to query against"),
-        maxRows: z.number().optional().default(1000).describe("Maximum number of rows to return")
-      }),
+      schema: DATABASE_QUERY_SCHEMA,
       func: async ({ sqlQuery, dataSource, maxRows }) => {
         try {
           // Validate query safety (basic SQL injection prevention)
@@ -94,11 +110,7 @@ export class SemanticSearchTool extends DynamicStructuredTool {
     super({
       name: "semantic_search",
       description: "Search semantic catalog for relevant context and business rules",
-      schema: z.object({
-        searchTerm: z.string().describe("Term to search for in semantic catalog"),
-        dataSource: z.enum(['coupa', 'baan', 'combined']).describe("Data source context"),
-        maxResults: z.number().optional().default(5).describe("Maximum number of results")
-      }),
+      schema: SEMANTIC_SEARCH_SCHEMA,
       func: async ({ searchTerm, dataSource, maxResults }) => {
         try {
           // Use existing semantic catalog functionality
@@ -138,12 +150,7 @@ export class InsightGenerationTool extends DynamicStructuredTool {
     super({
       name: "generate_insights",
       description: "Generate business insights from query results using AI analysis",
-      schema: z.object({
-        queryResults: z.array(z.any()).describe("Results from database query"),
-        queryContext: z.string().describe("Original query and context"),
-        dataSource: z.string().describe("Data source used"),
-        analysisType: z.enum(['variance', 'trend', 'risk', 'optimization', 'comparative']).describe("Type of analysis")
-      }),
+      schema: INSIGHT_GENERATION_SCHEMA,
       func: async ({ queryResults, queryContext, dataSource, analysisType }) => {
         try {
           // Generate insights using AI model
@@ -1,4 +1,5 @@
 // Enhanced Memory Framework for Smart Head - Memory-enhanced conversations
+import { randomUUID } from 'crypto'
 import { SmartHeadCacheService } from '../cache/redis-service'
 
 export interface LangGraphMemoryConfig {
@@ -69,11 +70,22 @@ export class LangGraphMemoryManager {
 
   // ===== Semantic Memory (Facts and Preferences) =====
   async storeSemanticFact(fact: SemanticFact): Promise<void> {
-    const key = `semantic:${this.config.userId}:${fact.id}`
-    await this.cache.safeSet(key, fact, 2592000) // 30 days
-    
-    // Also store in user index for retrieval
-    await this.addToUserIndex('semantic', fact.id)
+    await this.storeSemanticFacts([fact])
+  }
+
+  // Write several facts with one pipelined MSET and a single index update
+  async storeSemanticFacts(facts: SemanticFact[]): Promise<void> {
+    if (facts.length === 0) return
+
+    // Also store in user index for retrieval. The two writes touch different keys,
+    // so issue them together and let auto-pipelining share the round trip
+    await Promise.all([
+      this.cache.safeMSet(
+        facts.map(fact => [`semantic:${this.config.userId}:${fact.id}`, fact] as [string, SemanticFact]),
+        2592000 // 30 days
+      ),
+      this.addToUserIndex('semantic', facts.map(fact => fact.id))
+    ])
   }
 
   async getSemanticFacts(category?: string, limit: number = 10): Promise<SemanticFact[]> {
@@ -81,10 +93,12 @@ export class LangGraphMemoryManager {
       const factIds = await this.getUserIndex('semantic')
       const facts: SemanticFact[] = []
       
-      for (const factId of factIds.slice(0, limit * 2)) { // Get more to filter
-        const key = `semantic:${this.config.userId}:${factId}`
-        const fact = await this.cache.safeGet<SemanticFact>(key)
-        
+      // Get more to filter, in a single round trip
+      const candidates = await this.cache.safeMGet<SemanticFact>(
+        factIds.slice(0, limit * 2).map(factId => `semantic:${this.config.userId}:${factId}`)
+      )
+      
+      for (const fact of candidates) {
         if (fact && (!category || fact.category === category)) {
           facts.push(fact)
           if (facts.length >= limit) break
@@ -99,40 +113,32 @@ export class LangGraphMemoryManager {
   }
 
   async updateSemanticFact(factId: string, updates: Partial<SemanticFact>): Promise<void> {
+    // Nothing to merge - skip the Redis round trips and rewrite entirely
+    if (Object.keys(updates).length === 0) return
+
     const key = `semantic:${this.config.userId}:${factId}`
-    const existing = await this.cache.safeGet<SemanticFact>(key)
-    
-    if (existing) {
-      const updated = {
-        ...existing,
-        ...updates,
-        lastUpdated: new Date().toISOString()
-      }
-      await this.cache.safeSet(key, updated, 2592000)
-    }
+    await this.cache.safeUpdate<SemanticFact>(key, existing => existing && {
+      ...existing,
+      ...updates,
+      lastUpdated: new Date().toISOString()
+    }, 2592000)
   }
 
   // ===== Episodic Memory (Conversation Episodes) =====
   async storeConversationEpisode(episode: ConversationEpisode): Promise<void> {
     const key = `episodic:${this.config.userId}:${episode.id}`
-    await this.cache.safeSet(key, episode, 604800) // 7 days
-    
-    await this.addToUserIndex('episodic', episode.id)
+    await Promise.all([
+      this.cache.safeSet(key, episode, 604800), // 7 days
+      this.addToUserIndex('episodic', [episode.id])
+    ])
   }
 
   async getConversationEpisodes(limit: number = 5): Promise<ConversationEpisode[]> {
     try {
       const episodeIds = await this.getUserIndex('episodic')
-      const episodes: ConversationEpisode[] = []
-      
-      for (const episodeId of episodeIds.slice(0, limit)) {
-        const key = `episodic:${this.config.userId}:${episodeId}`
-        const episode = await this.cache.safeGet<ConversationEpisode>(key)
-        
-        if (episode) {
-          episodes.push(episode)
-        }
-      }
+      const episodes = (await this.cache.safeMGet<ConversationEpisode>(
+        episodeIds.slice(0, limit).map(episodeId => `episodic:${this.config.userId}:${episodeId}`)
+      )).filter((episode): episode is ConversationEpisode => episode !== null)
       
       return episodes.sort((a, b) => 
         new Date(b.startTime).getTime() - new Date(a.startTime).getTime()
@@ -170,24 +176,21 @@ export class LangGraphMemoryManager {
   // ===== Procedural Memory (Behavioral Patterns) =====
   async storeProceduralPattern(pattern: ProceduralMemory): Promise<void> {
     const key = `procedural:${this.config.userId}:${pattern.id}`
-    await this.cache.safeSet(key, pattern, 2592000) // 30 days
-    
-    await this.addToUserIndex('procedural', pattern.id)
+    await Promise.all([
+      this.cache.safeSet(key, pattern, 2592000), // 30 days
+      this.addToUserIndex('procedural', [pattern.id])
+    ])
   }
 
   async getProceduralPatterns(condition?: string): Promise<ProceduralMemory[]> {
     try {
       const patternIds = await this.getUserIndex('procedural')
-      const patterns: ProceduralMemory[] = []
-      
-      for (const patternId of patternIds) {
-        const key = `procedural:${this.config.userId}:${patternId}`
-        const pattern = await this.cache.safeGet<ProceduralMemory>(key)
-        
-        if (pattern && (!condition || pattern.condition === condition)) {
-          patterns.push(pattern)
-        }
-      }
+      const candidates = await this.cache.safeMGet<ProceduralMemory>(
+        patternIds.map(patternId => `procedural:${this.config.userId}:${patternId}`)
+      )
+      const patterns = candidates.filter((pattern): pattern is ProceduralMemory =>
+        pattern !== null && (!condition || pattern.condition === condition)
+      )
       
       return patterns.sort((a, b) => b.success_rate - a.success_rate)
     } catch (error) {
@@ -198,23 +201,21 @@ export class LangGraphMemoryManager {
 
   async updateProceduralPattern(patternId: string, success: boolean): Promise<void> {
     const key = `procedural:${this.config.userId}:${patternId}`
-    const existing = await this.cache.safeGet<ProceduralMemory>(key)
-    
-    if (existing) {
+    await this.cache.safeUpdate<ProceduralMemory>(key, existing => {
+      if (!existing) return null
+
       const newCount = existing.usage_count + 1
       const newSuccessRate = success 
         ? ((existing.success_rate * existing.usage_count) + 1) / newCount
         : (existing.success_rate * existing.usage_count) / newCount
       
-      const updated = {
+      return {
         ...existing,
         success_rate: newSuccessRate,
         usage_count: newCount,
         lastUsed: new Date().toISOString()
       }
-      
-      await this.cache.safeSet(key, updated, 2592000)
-    }
+    }, 2592000)
   }
 
   // ===== Context Management =====
@@ -222,8 +223,11 @@ export class LangGraphMemoryManager {
     // Simplified retrieval - in production, use vector similarity
     const memories: MemoryEntry[] = []
     
-    // Get recent semantic facts
-    const facts = await this.getSemanticFacts(undefined, 3)
+    // Recent semantic facts and episodes, fetched together
+    const [facts, episodes] = await Promise.all([
+      this.getSemanticFacts(undefined, 3),
+      this.getConversationEpisodes(2)
+    ])
     memories.push(...facts.map(fact => ({
       id: fact.id,
       content: fact.fact,
@@ -238,8 +242,6 @@ export class LangGraphMemoryManager {
       }
     })))
     
-    // Get recent episodes
-    const episodes = await this.getConversationEpisodes(2)
     memories.push(...episodes.map(episode => ({
       id: episode.id,
       content: episode.summary,
@@ -258,22 +260,29 @@ export class LangGraphMemoryManager {
   }
 
   async getCurrentUserContext(): Promise<any> {
+    const [semanticFacts, recentEpisodes, activePatterns] = await Promise.all([
+      this.getSemanticFacts(undefined, 5),
+      this.getConversationEpisodes(3),
+      this.getProceduralPatterns()
+    ])
+
     return {
-      semanticFacts: await this.getSemanticFacts(undefined, 5),
-      recentEpisodes: await this.getConversationEpisodes(3),
-      activePatterns: await this.getProceduralPatterns(),
+      semanticFacts,
+      recentEpisodes,
+      activePatterns,
       timestamp: new Date().toISOString()
     }
   }
 
   // ===== Helper Methods =====
-  private async addToUserIndex(type: string, id: string): Promise<void> {
+  private async addToUserIndex(type: string, ids: string[]): Promise<void> {
     const indexKey = `index:${type}:${this.config.userId}`
-    const existing = await this.cache.safeGet<string[]>(indexKey) || []
     
     // Add to front and limit size
-    const updated = [id, ...existing.filter(existingId => existingId !== id)].slice(0, 100)
-    await this.cache.safeSet(indexKey, updated, 2592000)
+    await this.cache.safeUpdate<string[]>(indexKey, existing =>
+      [...ids, ...(existing || []).filter(existingId => !ids.includes(existingId))].slice(0, 100),
+      2592000
+    )
   }
 
   private async getUserIndex(type: string): Promise<string[]> {
@@ -307,11 +316,14 @@ export class LangGraphMemoryManager {
     ]
     
     for (const message of messages) {
+      // Lowercase once per message rather than once per keyword
+      const content = message.content.toLowerCase()
       for (const keyword of topicKeywords) {
-        if (message.content.toLowerCase().includes(keyword)) {
+        if (content.includes(keyword)) {
           topics.add(keyword)
         }
       }
+      if (topics.size >= 5) break
     }
     
     return Array.from(topics).slice(0, 5)
@@ -410,24 +422,27 @@ export class MemoryCoordinator {
     success: boolean,
     insights: string[] = []
   ): Promise<void> {
-    // Store facts if new preferences or information discovered
-    for (const insight of insights) {
-      if (insight.includes('prefer') || insight.includes('like')) {
-        await this.semanticMemory.storeSemanticFact({
-          id: `fact_${Date.now()}`,
-          userId: this.userId,
-          fact: insight,
-          category: 'preference',
-          confidence: 0.8,
-          lastUpdated: new Date().toISOString(),
-          sources: ['conversation']
-        })
-      }
-    }
+    // Store facts if new preferences or information discovered, collected so the
+    // whole turn is written at once rather than one SET and index update per insight
+    const lastUpdated = new Date().toISOString()
+    const facts = insights
+      .filter(insight => insight.includes('prefer') || insight.includes('like'))
+      .map((insight): SemanticFact => ({
+        id: `fact_${Date.now()}_${randomUUID()}`,
+        userId: this.userId,
+        fact: insight,
+        category: 'preference',
+        confidence: 0.8,
+        lastUpdated,
+        sources: ['conversation']
+      }))
 
     // Update procedural patterns based on query success
     const pattern = `query_type:${this.categorizeQuery(query)}`
-    await this.proceduralMemory.updateProceduralPattern(pattern, success)
+    await Promise.all([
+      this.semanticMemory.storeSemanticFacts(facts),
+      this.proceduralMemory.updateProceduralPattern(pattern, success)
+    ])
   }
 
   private categorizeQuery(query: string): string {
@@ -1,6 +1,66 @@
 import { Database } from './database'
+import { randomUUID } from 'crypto'
+import type { QueryConfig } from 'pg'
 import { MessageFeedback, EvidenceReference, FileUpload } from '@/lib/types'
 
+// Per-message lookups run on every evidence/feedback view, so pg prepares each once per pooled connection
+const SQL_QUERY_QUERY: QueryConfig = {
+  name: 'message_sql_query',
+  text: 'SELECT sql_query FROM stored_message_data WHERE message_id = $1 AND user_id = $2'
+}
+
+const RESPONSE_DATA_QUERY: QueryConfig = {
+  name: 'message_response_data',
+  text: 'SELECT response_data FROM stored_message_data WHERE message_id = $1 AND user_id = $2'
+}
+
+const MESSAGE_EVIDENCE_QUERY: QueryConfig = {
+  name: 'message_evidence',
+  text: `SELECT evidence_id, message_id, user_id, evidence_type, evidence_data, metadata, 
+                confidence_score, data_sources, artifact_url, created_at, updated_at
+         FROM evidence_references 
+         WHERE message_id = $1 AND user_id = $2`
+}
+
+const EVIDENCE_BY_ID_QUERY: QueryConfig = {
+  name: 'evidence_by_id',
+  text: `SELECT evidence_id, message_id, user_id, evidence_type, evidence_data, metadata, 
+                confidence_score, data_sources, artifact_url, created_at, updated_at
+         FROM evidence_references 
+         WHERE evidence_id = $1 AND user_id = $2`
+}
+
+const MESSAGE_FEEDBACK_QUERY: QueryConfig = {
+  name: 'message_feedback',
+  text: `SELECT message_id, user_id, rating, notes, evidence_reference_id, feedback_type, created_at, updated_at
+         FROM message_feedback 
+         WHERE message_id = $1 AND user_id = $2`
+}
+
+// Rows per multi-row upsert in storeMany; keeps a statement well under pg's 65535 parameter limit
+const MESSAGE_INSERT_BATCH_SIZE = 500
+
+// Everything getMessageWithEvidence needs in one round trip: the keys row drives the joins so a
+// message with only some of its data stored still returns a row, and evidence comes back as JSON
+const MESSAGES_WITH_EVIDENCE_QUERY: QueryConfig = {
+  name: 'messages_with_evidence',
+  text: `SELECT k.message_id, d.sql_query, d.response_data,
+                f.message_id AS feedback_message_id, f.rating, f.notes, f.evidence_reference_id, f.feedback_type,
+                f.created_at AS feedback_created_at, f.updated_at AS feedback_updated_at,
+                COALESCE((
+                  SELECT json_agg(e)
+                  FROM evidence_references e
+                  WHERE e.message_id = k.message_id AND e.user_id = k.user_id
+                ), '[]') AS evidence
+         FROM (
+           SELECT ids.message_id, $2::varchar AS user_id, ids.ord
+           FROM unnest($1::varchar[]) WITH ORDINALITY AS ids(message_id, ord)
+         ) k
+         LEFT JOIN stored_message_data d ON d.message_id = k.message_id AND d.user_id = k.user_id
+         LEFT JOIN message_feedback f ON f.message_id = k.message_id AND f.user_id = k.user_id
+         ORDER BY k.ord`
+}
+
 interface StoredMessage {
   messageId: string
   userId: string
@@ -53,12 +113,60 @@ export class DatabaseMessageStorage {
     }
   }
 
+  /**
+   * Upsert data for several messages, one multi-row statement per batch.
+   * Batches commit independently; the upsert is idempotent, so a failed call can be retried whole.
+   */
+  async storeMany(userId: string, entries: Array<{ messageId: string; sqlQuery?: string; responseData?: any }>): Promise<void> {
+    if (!userId) return
+
+    // ON CONFLICT cannot touch the same row twice in one statement, so keep the last entry per message
+    const byId = new Map<string, { sqlQuery?: string; responseData?: any }>()
+    for (const entry of entries) {
+      if (entry.messageId) byId.set(entry.messageId, entry)
+    }
+    if (byId.size === 0) return
+
+    const rows = Array.from(byId)
+
+    try {
+      for (let offset = 0; offset < rows.length; offset += MESSAGE_INSERT_BATCH_SIZE) {
+        const values: string[] = []
+        const params: any[] = []
+        for (const [messageId, data] of rows.slice(offset, offset + MESSAGE_INSERT_BATCH_SIZE)) {
+          const base = params.length
+          values.push(`($${base + 1}, $${base + 2}, $${base + 3}, $${base + 4}, NOW())`)
+          params.push(
+            messageId,
+            userId,
+            data.sqlQuery || null,
+            data.responseData ? JSON.stringify(data.responseData) : null
+          )
+        }
+
+        await Database.query(
+          `INSERT INTO stored_message_data (message_id, user_id, sql_query, response_data, updated_at)
+           VALUES ${values.join(', ')}
+           ON CONFLICT (message_id) 
+           DO UPDATE SET 
+             sql_query = EXCLUDED.sql_query,
+             response_data = EXCLUDED.response_data,
+             updated_at = NOW()`,
+          params
+        )
+      }
+    } catch (error) {
+      console.error('Failed to store message data batch:', error)
+      throw error
+    }
+  }
+
   async getSQLQuery(messageId: string, userId: string): Promise<string | null> {
     if (!messageId || !userId) return null
 
     try {
       const result = await Database.query(
-        'SELECT sql_query FROM stored_message_data WHERE message_id = $1 AND user_id = $2',
+        SQL_QUERY_QUERY,
         [messageId, userId]
       )
 
@@ -74,12 +182,12 @@ export class DatabaseMessageStorage {
 
     try {
       const result = await Database.query(
-        'SELECT response_data FROM stored_message_data WHERE message_id = $1 AND user_id = $2',
+        RESPONSE_DATA_QUERY,
         [messageId, userId]
       )
 
       if (result.rows.length > 0 && result.rows[0].response_data) {
-        return JSON.parse(result.rows[0].response_data)
+        return result.rows[0].response_data
       }
       return null
     } catch (error) {
@@ -181,26 +289,11 @@ export class DatabaseMessageStorage {
 
     try {
       const result = await Database.query(
-        `SELECT evidence_id, message_id, user_id, evidence_type, evidence_data, metadata, 
-                confidence_score, data_sources, artifact_url, created_at, updated_at
-         FROM evidence_references 
-         WHERE message_id = $1 AND user_id = $2`,
+        MESSAGE_EVIDENCE_QUERY,
         [messageId, userId]
       )
 
-      return result.rows.map(row => ({
-        evidenceId: row.evidence_id,
-        messageId: row.message_id,
-        userId: row.user_id,
-        evidenceType: row.evidence_type,
-        evidenceData: JSON.parse(row.evidence_data),
-        metadata: row.metadata ? JSON.parse(row.metadata) : undefined,
-        confidenceScore: row.confidence_score,
-        dataSources: row.data_sources ? JSON.parse(row.data_sources) : undefined,
-        artifactUrl: row.artifact_url,
-        createdAt: row.created_at,
-        updatedAt: row.updated_at
-      }))
+      return result.rows.map(row => this.mapEvidenceRow(row))
     } catch (error) {
       console.error('Failed to get evidence references:', error)
       return []
@@ -215,35 +308,40 @@ export class DatabaseMessageStorage {
 
     try {
       const result = await Database.query(
-        `SELECT evidence_id, message_id, user_id, evidence_type, evidence_data, metadata, 
-                confidence_score, data_sources, artifact_url, created_at, updated_at
-         FROM evidence_references 
-         WHERE evidence_id = $1 AND user_id = $2`,
+        EVIDENCE_BY_ID_QUERY,
         [evidenceId, userId]
       )
 
       if (result.rows.length === 0) return null
 
-      const row = result.rows[0]
-      return {
-        evidenceId: row.evidence_id,
-        messageId: row.message_id,
-        userId: row.user_id,
-        evidenceType: row.evidence_type,
-        evidenceData: JSON.parse(row.evidence_data),
-        metadata: row.metadata ? JSON.parse(row.metadata) : undefined,
-        confidenceScore: row.confidence_score,
-        dataSources: row.data_sources ? JSON.parse(row.data_sources) : undefined,
-        artifactUrl: row.artifact_url,
-        createdAt: row.created_at,
-        updatedAt: row.updated_at
-      }
+      return this.mapEvidenceRow(result.rows[0])
     } catch (error) {
       console.error('Failed to get evidence reference:', error)
       return null
     }
   }
 
+  /**
+   * Map an evidence_references row (or its json_agg element) to an EvidenceReference.
+   * pg returns DECIMAL columns as strings and TIMESTAMP columns as Dates, while json_agg
+   * yields a number and ISO strings, so both shapes are normalized here.
+   */
+  private mapEvidenceRow(row: any): EvidenceReference {
+    return {
+      evidenceId: row.evidence_id,
+      messageId: row.message_id,
+      userId: row.user_id,
+      evidenceType: row.evidence_type,
+      evidenceData: row.evidence_data,
+      metadata: row.metadata || undefined,
+      confidenceScore: row.confidence_score != null ? Number(row.confidence_score) : undefined,
+      dataSources: row.data_sources || undefined,
+      artifactUrl: row.artifact_url,
+      createdAt: new Date(row.created_at),
+      updatedAt: new Date(row.updated_at)
+    }
+  }
+
   // === FEEDBACK METHODS ===
 
   /**
@@ -287,9 +385,7 @@ export class DatabaseMessageStorage {
 
     try {
       const result = await Database.query(
-        `SELECT message_id, user_id, rating, notes, evidence_reference_id, feedback_type, created_at, updated_at
-         FROM message_feedback 
-         WHERE message_id = $1 AND user_id = $2`,
+        MESSAGE_FEEDBACK_QUERY,
         [messageId, userId]
       )
 
@@ -352,23 +448,12 @@ export class DatabaseMessageStorage {
     if (!messageId || !userId) return null
 
     try {
-      // Get stored message data
-      const messageData = await this.getResponseData(messageId, userId)
-      const sqlQuery = await this.getSQLQuery(messageId, userId)
-      
-      // Get evidence references
-      const evidenceReferences = await this.getEvidenceReferences(messageId, userId)
-      
-      // Get feedback
-      const feedback = await this.getFeedback(messageId, userId)
+      const result = await Database.query(
+        MESSAGES_WITH_EVIDENCE_QUERY,
+        [[messageId], userId]
+      )
 
-      return {
-        messageId,
-        sqlQuery,
-        responseData: messageData,
-        evidenceReferences,
-        feedback: feedback || undefined
-      }
+      return this.mapMessageWithEvidenceRow(result.rows[0], userId)
     } catch (error) {
       console.error('Failed to get message with evidence:', error)
       return null
@@ -382,22 +467,41 @@ export class DatabaseMessageStorage {
     if (!messageIds.length || !userId) return []
 
     try {
-      const messages: MessageWithEvidence[] = []
-      
-      for (const messageId of messageIds) {
-        const messageWithEvidence = await this.getMessageWithEvidence(messageId, userId)
-        if (messageWithEvidence) {
-          messages.push(messageWithEvidence)
-        }
-      }
-      
-      return messages
+      // One round trip for the whole conversation instead of a query per message
+      const result = await Database.query(
+        MESSAGES_WITH_EVIDENCE_QUERY,
+        [messageIds, userId]
+      )
+
+      return result.rows.map(row => this.mapMessageWithEvidenceRow(row, userId))
     } catch (error) {
       console.error('Failed to get conversation context:', error)
       return []
     }
   }
 
+  /**
+   * Map a row of the messages-with-evidence query to a MessageWithEvidence
+   */
+  private mapMessageWithEvidenceRow(row: any, userId: string): MessageWithEvidence {
+    return {
+      messageId: row.message_id,
+      sqlQuery: row.sql_query || null,
+      responseData: row.response_data || null,
+      evidenceReferences: row.evidence.map((evidence: any) => this.mapEvidenceRow(evidence)),
+      feedback: row.feedback_message_id ? {
+        messageId: row.message_id,
+        userId,
+        rating: row.rating,
+        notes: row.notes,
+        evidenceReferenceId: row.evidence_reference_id,
+        feedbackType: row.feedback_type,
+        createdAt: row.feedback_created_at,
+        updatedAt: row.feedback_updated_at
+      } : undefined
+    }
+  }
+
   /**
    * Get feedback statistics for a user
    */
@@ -429,6 +533,29 @@ export class DatabaseMessageStorage {
 
   // === FILE UPLOAD MANAGEMENT ===
 
+  /**
+   * Map a file_uploads row to a FileUpload
+   */
+  private mapFileUploadRow(row: any): FileUpload {
+    return {
+      fileId: row.file_id,
+      userId: row.user_id,
+      originalFilename: row.original_filename,
+      fileType: row.file_type,
+      fileSize: parseInt(row.file_size),
+      mimeType: row.mime_type,
+      objectPath: row.object_path,
+      uploadContext: row.upload_context || {},
+      processingStatus: row.processing_status,
+      processingResult: row.processing_result || undefined,
+      chatContext: row.chat_context || undefined,
+      errorMessage: row.error_message || undefined,
+      createdAt: new Date(row.created_at),
+      updatedAt: new Date(row.updated_at),
+      processedAt: row.processed_at ? new Date(row.processed_at) : undefined
+    }
+  }
+
   /**
    * Store file upload metadata
    */
@@ -519,24 +646,7 @@ export class DatabaseMessageStorage {
 
       if (result.rows.length === 0) return null
 
-      const row = result.rows[0]
-      return {
-        fileId: row.file_id,
-        userId: row.user_id,
-        originalFilename: row.original_filename,
-        fileType: row.file_type,
-        fileSize: parseInt(row.file_size),
-        mimeType: row.mime_type,
-        objectPath: row.object_path,
-        uploadContext: row.upload_context ? JSON.parse(row.upload_context) : {},
-        processingStatus: row.processing_status,
-        processingResult: row.processing_result ? JSON.parse(row.processing_result) : undefined,
-        chatContext: row.chat_context ? JSON.parse(row.chat_context) : undefined,
-        errorMessage: row.error_message || undefined,
-        createdAt: new Date(row.created_at),
-        updatedAt: new Date(row.updated_at),
-        processedAt: row.processed_at ? new Date(row.processed_at) : undefined
-      }
+      return this.mapFileUploadRow(result.rows[0])
     } catch (error) {
       console.error('Failed to get file upload:', error)
       return null
@@ -553,23 +663,7 @@ export class DatabaseMessageStorage {
         [userId, limit]
       )
 
-      return result.rows.map(row => ({
-        fileId: row.file_id,
-        userId: row.user_id,
-        originalFilename: row.original_filename,
-        fileType: row.file_type,
-        fileSize: parseInt(row.file_size),
-        mimeType: row.mime_type,
-        objectPath: row.object_path,
-        uploadContext: row.upload_context ? JSON.parse(row.upload_context) : {},
-        processingStatus: row.processing_status,
-        processingResult: row.processing_result ? JSON.parse(row.processing_result) : undefined,
-        chatContext: row.chat_context ? JSON.parse(row.chat_context) : undefined,
-        errorMessage: row.error_message || undefined,
-        createdAt: new Date(row.created_at),
-        updatedAt: new Date(row.updated_at),
-        processedAt: row.processed_at ? new Date(row.processed_at) : undefined
-      }))
+      return result.rows.map(row => this.mapFileUploadRow(row))
     } catch (error) {
       console.error('Failed to get user file uploads:', error)
       return []
@@ -584,7 +678,7 @@ export class DatabaseMessageStorage {
       return null
     }
 
-    const evidenceId = `evidence_${Date.now()}_${Math.random().toString(36).substr(2, 9)}`
+    const evidenceId = `evidence_${Date.now()}_${randomUUID()}`
     
     // Determine evidence type based on file type
     const evidenceTypeMap: Record<string, string> = {
@@ -650,23 +744,7 @@ export class DatabaseMessageStorage {
 
       const result = await Database.query(query, params)
 
-      const files: FileUpload[] = result.rows.map(row => ({
-        fileId: row.file_id,
-        userId: row.user_id,
-        originalFilename: row.original_filename,
-        fileType: row.file_type,
-        fileSize: parseInt(row.file_size),
-        mimeType: row.mime_type,
-        objectPath: row.object_path,
-        uploadContext: row.upload_context ? JSON.parse(row.upload_context) : {},
-        processingStatus: row.processing_status,
-        processingResult: row.processing_result ? JSON.parse(row.processing_result) : undefined,
-        chatContext: row.chat_context ? JSON.parse(row.chat_context) : undefined,
-        errorMessage: row.error_message || undefined,
-        createdAt: new Date(row.created_at),
-        updatedAt: new Date(row.updated_at),
-        processedAt: row.processed_at ? new Date(row.processed_at) : undefined
-      }))
+      const files: FileUpload[] = result.rows.map(row => this.mapFileUploadRow(row))
 
       // Aggregate insights and suggestions
       const allInsights: string[] = []
@@ -11,6 +11,7 @@ export interface ValidationMiddlewareConfig {
   strictMode: boolean
   confidenceThreshold: number
   logValidationResults: boolean
+  logSampleRate: number  // 0-1 fraction of validation summaries to log; critical errors are always logged
   autoCorrect: boolean
 }
 
@@ -75,6 +76,7 @@ export class ValidationMiddleware {
       strictMode: false,
       confidenceThreshold: 0.8,
       logValidationResults: true,
+      logSampleRate: 1,
       autoCorrect: true,
       ...config
     }
@@ -458,6 +460,17 @@ export class ValidationMiddleware {
    * Log validation results for monitoring
    */
   private logValidationResults(endpoint: string, result: APIValidationResult): void {
+    // Log critical errors
+    if (result.errors.some(e => e.severity === 'critical')) {
+      console.error('[Critical Validation Error]', {
+        endpoint,
+        errors: result.errors.filter(e => e.severity === 'critical')
+      })
+    }
+
+    // Sample the routine summary so busy endpoints don't pay for a pretty-printed log every call
+    if (Math.random() >= this.config.logSampleRate) return
+
     const logData = {
       timestamp: new Date().toISOString(),
       endpoint,
@@ -470,14 +483,6 @@ export class ValidationMiddleware {
     }
 
     console.log('[Validation Middleware]', JSON.stringify(logData, null, 2))
-
-    // Log critical errors
-    if (result.errors.some(e => e.severity === 'critical')) {
-      console.error('[Critical Validation Error]', {
-        endpoint,
-        errors: result.errors.filter(e => e.severity === 'critical')
-      })
-    }
   }
 
   /**
@@ -501,6 +506,7 @@ export const validationMiddleware = new ValidationMiddleware({
   strictMode: false,
   confidenceThreshold: 0.8,
   logValidationResults: true,
+  logSampleRate: parseFloat(process.env.VALIDATION_LOG_SAMPLE_RATE || '1'),
   autoCorrect: true
 })
 
@@ -1,4 +1,5 @@
 import { Database } from '../database'
+import { randomUUID } from 'crypto'
 import { DatabaseChatStorageService } from '../chat-storage-db'
 import { DatabaseMessageStorage } from '../message-storage-db'
 import type { ChatMessage, SavedChat, MessageFeedback, EvidenceReference } from '@/lib/types'
@@ -46,15 +47,17 @@ export class UnifiedStorageService {
     try {
       const savedChat = await this.chatStorage.saveChat(chatId, messages, userId)
       
-      // Also store message-specific data (SQL queries, response data)
-      for (const message of messages) {
-        if (message.sqlQuery || message.metadata) {
-          await this.messageStorage.store(message.id, userId, {
+      // Also store message-specific data (SQL queries, response data) in one round trip
+      await this.messageStorage.storeMany(
+        userId,
+        messages
+          .filter(message => message.sqlQuery || message.metadata)
+          .map(message => ({
+            messageId: message.id,
             sqlQuery: message.sqlQuery,
             responseData: message.metadata
-          })
-        }
-      }
+          }))
+      )
 
       return savedChat
     } catch (error) {
@@ -271,7 +274,7 @@ export class UnifiedStorageService {
    * Generate a unique chat ID
    */
   generateChatId(): string {
-    return `chat_${Date.now()}_${Math.random().toString(36).substr(2, 9)}`
+    return `chat_${Date.now()}_${randomUUID()}`
   }
 
   /**
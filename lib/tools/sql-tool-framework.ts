@@ -51,6 +51,9 @@ export interface ToolCallResult {
   followUpQueries: string[]
 }
 
+// Table/column listing used as SQL generation context; refreshed hourly
+const SCHEMA_CONTEXT_TTL_SECONDS = 3600
+
 export class SQLToolFramework {
   private geminiClient: EnhancedGeminiClient
   private semanticCatalog: SemanticCatalog
@@ -343,14 +346,27 @@ Return ONLY the corrected SQL query, no explanations.`
         }
       }
       
-      // Execute with timeout
+      // Execute with timeout. statement_timeout makes Postgres cancel the query itself; the
+      // client-side timer is a backstop for a stalled connection. A client that errored or
+      // timed out is destroyed rather than handed back to the pool mid-query.
       const client = await Database.getClient()
-      const timeoutPromise = new Promise((_, reject) => 
-        setTimeout(() => reject(new Error('Query timeout')), executionTimeout)
-      )
+      let timer: ReturnType<typeof setTimeout> | undefined
+      const timeoutPromise = new Promise((_, reject) => {
+        timer = setTimeout(() => reject(new Error('Query timeout')), executionTimeout)
+      })
       
-      const queryPromise = client.query(sql)
-      const result = await Promise.race([queryPromise, timeoutPromise]) as any
+      let result: any
+      try {
+        await client.query(`SET statement_timeout = ${executionTimeout}`)
+        result = await Promise.race([client.query(sql), timeoutPromise])
+        await client.query('RESET statement_timeout')
+        client.release()
+      } catch (error) {
+        client.release(error instanceof Error ? error : true)
+        throw error
+      } finally {
+        clearTimeout(timer)
+      }
       
       const data = result.rows || []
       const executionTime = Date.now() - startTime
@@ -682,7 +698,12 @@ Provide specific, actionable follow-up questions.`
   }
 
   private async getSchemaContext(dataSource: string): Promise<any> {
-    // Get schema information for better SQL generation
+    // Get schema information for better SQL generation. The schema only changes on
+    // migrations, so serve it from cache instead of hitting information_schema per query
+    const cacheKey = 'schema_context:public'
+    const cached = await this.cache.safeGet<any[]>(cacheKey)
+    if (cached) return cached
+
     try {
       const schemaQuery = `
         SELECT table_name, column_name, data_type 
@@ -692,9 +713,9 @@ Provide specific, actionable follow-up questions.`
         LIMIT 100
       `
       
-      const client = await Database.getClient()
-      const result = await client.query(schemaQuery)
+      const result = await Database.query(schemaQuery)
       
+      await this.cache.safeSet(cacheKey, result.rows, SCHEMA_CONTEXT_TTL_SECONDS)
       return result.rows
     } catch (error) {
       console.error('Schema context error:', error)